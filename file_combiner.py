@@ -6,21 +6,28 @@ High-performance file combiner optimized for large repositories and AI agents
 Performance Features:
 - True async I/O with prefetching for streaming writes
 - Concurrent file restoration during split operations
-- ThreadPoolExecutor for parallel metadata collection
+- Bounded async workers for metadata collection that needs file reads
 - O(1) memory streaming architecture
 """
 
 import argparse
 import asyncio
-import base64
+import binascii
+import codecs
+import collections
+import contextlib
 import difflib
+import errno
 import functools
 import gzip
 import hashlib
+import importlib.util
 import io
+import itertools
 import json
 import mimetypes
 import os
+import queue
 import re
 import shutil
 import signal
@@ -29,14 +36,198 @@ import subprocess
 import sys
 import time
 import tempfile
+import threading
 import traceback
 import urllib.parse
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass, asdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Dict, Optional, Union, Tuple, Callable, Any
+from typing import (
+    List, Dict, Optional, Union, Tuple, Callable, Any, AsyncIterator, BinaryIO, IO,
+    Iterator, Sequence, Set,
+)
 import fnmatch
 import logging
+import mmap
+
+
+def _dumps_json(obj: Any, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, in C via orjson when it is installed.
+
+    Compact output by default; ``indent`` gives two-space indentation with
+    non-ASCII left unescaped. Falls back to the stdlib for anything orjson
+    rejects, such as surrogate-escaped file names.
+    """
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+        except TypeError:
+            pass
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj).encode("utf-8")
+
+
+def _loads_json(data: Union[str, bytes]) -> Any:
+    """Parse JSON from str or UTF-8 bytes, in C via orjson when it is installed.
+
+    Falls back to the stdlib for input orjson rejects, such as the escaped
+    surrogates _dumps_json writes for names that are not valid UTF-8.
+    """
+    if HAS_ORJSON:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def _b64encode(data: Union[bytes, bytearray, memoryview]) -> bytes:
+    """Base64-encode bytes-like data without a newline, via pybase64 if installed."""
+    if HAS_PYBASE64:
+        encoded: bytes = pybase64.b64encode(data)
+        return encoded
+    return binascii.b2a_base64(data, newline=False)
+
+
+def _b64decode(data: Union[str, bytes, bytearray, memoryview]) -> bytes:
+    """Decode base64 from ASCII str or bytes-like data, skipping line breaks.
+
+    Uses pybase64's SIMD decoder when it is installed; both paths raise
+    binascii.Error on malformed padding.
+    """
+    if HAS_PYBASE64:
+        decoded: bytes = pybase64.b64decode(data, validate=False)
+        return decoded
+    return binascii.a2b_base64(data)
+
+
+def _advise_sequential(f) -> None:
+    """Hint that the file behind ``f`` is read once, front to back.
+
+    Lets the kernel read ahead more aggressively; a no-op where
+    posix_fadvise is unavailable or ``f`` has no descriptor.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    with contextlib.suppress(AttributeError, OSError, ValueError):
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+
+def _preallocate(f, size: int) -> None:
+    """Reserve ``size`` bytes for a file that is about to be written.
+
+    Lets the filesystem lay out a large restored file in one go instead
+    of growing it write by write. Small files are left alone, and so are
+    platforms without posix_fallocate. This also sets the file size, so
+    the caller truncates if fewer bytes end up written.
+    """
+    if size < _PREALLOCATE_SIZE or not hasattr(os, "posix_fallocate"):
+        return
+    with contextlib.suppress(OSError, ValueError):
+        os.posix_fallocate(f.fileno(), 0, size)
+
+
+def _is_utf8(data: bytes) -> bool:
+    """Validate UTF-8 without materializing the decoded text.
+
+    ASCII is confirmed in one C pass; anything else is decoded in
+    _UTF8_CHECK_CHUNK slices so only a small transient str is built.
+    """
+    if data.isascii():
+        return True
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        with memoryview(data) as view:
+            for start in range(0, len(view), _UTF8_CHECK_CHUNK):
+                decoder.decode(view[start : start + _UTF8_CHECK_CHUNK])
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _count_trailing_newlines(lines: Sequence[str]) -> int:
+    """Count the trailing newlines of ``"\\n".join(lines)`` without joining."""
+    count = 0
+    for i in range(len(lines) - 1, -1, -1):
+        line = lines[i]
+        end = len(line)
+        while end and line[end - 1] == "\n":
+            end -= 1
+        count += len(line) - end
+        if end or i == 0:
+            break
+        count += 1  # the separator before this empty line
+    return count
+
+
+def _copy_fd_range(
+    src_fd: int, dst_fd: int, count: int, offset: Optional[int] = None
+) -> int:
+    """Copy up to ``count`` bytes between file descriptors, in-kernel if possible.
+
+    Tries os.copy_file_range, then os.sendfile (Linux), then a read/write
+    loop. Reads from ``offset`` when given, otherwise from the current
+    position of ``src_fd``. Returns the number of bytes copied, which is
+    short only if the source ends early.
+    """
+    copied = 0
+
+    def source_offset() -> Optional[int]:
+        return None if offset is None else offset + copied
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < count:
+                n = os.copy_file_range(src_fd, dst_fd, count - copied, source_offset())
+                if n == 0:
+                    return copied
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                raise
+
+    if sys.platform.startswith("linux") and hasattr(os, "sendfile"):
+        try:
+            while copied < count:
+                n = os.sendfile(dst_fd, src_fd, source_offset(), count - copied)
+                if n == 0:
+                    return copied
+                copied += n
+            return copied
+        except OSError as e:
+            if e.errno not in (errno.ENOSYS, errno.EINVAL):
+                raise
+
+    if offset is not None:
+        os.lseek(src_fd, offset + copied, os.SEEK_SET)
+    while copied < count:
+        chunk = os.read(src_fd, min(1024 * 1024, count - copied))
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst_fd, view) :]
+        copied += len(chunk)
+    return copied
+
+
+_thread_buffers = threading.local()
+
+
+def _thread_buffer(size: int) -> memoryview:
+    """Return the calling thread's reusable read buffer of ``size`` bytes.
+
+    Chunked reads ``readinto`` this instead of allocating a fresh bytes
+    object per chunk. The contents are only valid until the same thread
+    reads into it again.
+    """
+    view = getattr(_thread_buffers, "view", None)
+    if view is None or len(view) != size:
+        view = _thread_buffers.view = memoryview(bytearray(size))
+    return view
 
 
 # Async helper for running blocking I/O in thread pool
@@ -54,38 +245,106 @@ async def run_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
             None, functools.partial(func, *args, **kwargs)
         )
 
-# Optional pathspec for gitignore support
+# Optional pathspec (gitignore support), rich and tqdm (progress display).
+# These are only looked up here and imported where they are first used, so
+# commands that never need them (--help, --version, --create-config) do not
+# pay for importing them
+HAS_PATHSPEC = importlib.util.find_spec("pathspec") is not None
+HAS_RICH = importlib.util.find_spec("rich") is not None
+HAS_TQDM = importlib.util.find_spec("tqdm") is not None
+
+# Optional SIMD gzip implementations (drop-in replacements for gzip)
 try:
-    import pathspec
-    HAS_PATHSPEC = True
+    from isal import igzip as isal_gzip
+
+    HAS_ISAL = True
 except ImportError:
-    HAS_PATHSPEC = False
-    pathspec = None
+    HAS_ISAL = False
+    isal_gzip = None  # type: ignore[assignment]
 
 try:
-    from rich.console import Console
-    from rich.progress import (
-        Progress,
-        SpinnerColumn,
-        TextColumn,
-        BarColumn,
-        TimeElapsedColumn,
-        MofNCompleteColumn,
-    )
+    from zlib_ng import gzip_ng
+
+    HAS_ZLIB_NG = True
+except ImportError:
+    HAS_ZLIB_NG = False
+    gzip_ng = None  # type: ignore[assignment]
+
+# Optional zstandard for .zst archives
+try:
+    import zstandard
+
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+    zstandard = None  # type: ignore[assignment]
+
+# TOML config parsing: stdlib on 3.11+, the tomli backport before that
+try:
+    import tomllib
+
+    HAS_TOMLLIB = True
+except ImportError:
+    try:
+        import tomli as tomllib
+
+        HAS_TOMLLIB = True
+    except ImportError:
+        HAS_TOMLLIB = False
+        tomllib = None  # type: ignore[assignment]
+
+# Optional rapidgzip for parallel gzip decompression
+try:
+    import rapidgzip
+
+    HAS_RAPIDGZIP = True
+except ImportError:
+    HAS_RAPIDGZIP = False
+    rapidgzip = None  # type: ignore[assignment]
+
+# Optional orjson for faster metadata serialization
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+    orjson = None  # type: ignore[assignment]
+
+# Optional faster checksum algorithms
+try:
+    import blake3
 
-    HAS_RICH = True
+    HAS_BLAKE3 = True
 except ImportError:
-    HAS_RICH = False
-    Console = None
-    Progress = None
+    HAS_BLAKE3 = False
+    blake3 = None  # type: ignore[assignment]
 
 try:
-    from tqdm import tqdm
+    import xxhash
 
-    HAS_TQDM = True
+    HAS_XXHASH = True
 except ImportError:
-    HAS_TQDM = False
-    tqdm = None
+    HAS_XXHASH = False
+    xxhash = None  # type: ignore[assignment]
+
+# Optional pybase64 for SIMD base64 encoding and decoding
+try:
+    import pybase64
+
+    HAS_PYBASE64 = True
+except ImportError:
+    HAS_PYBASE64 = False
+    pybase64 = None  # type: ignore[assignment]
+
+# Optional RE2 (google-re2) for linear-time glob matching
+try:
+    import re2
+
+    HAS_RE2 = True
+except ImportError:
+    HAS_RE2 = False
+    re2 = None  # type: ignore[assignment]
 
 
 __version__ = "2.1.0"
@@ -93,7 +352,13 @@ __author__ = "File Combiner Project"
 __license__ = "MIT"
 
 
-@dataclass
+# dataclass(slots=True) is only available from Python 3.10
+_DATACLASS_SLOTS: Dict[str, Any] = (
+    {"slots": True} if sys.version_info >= (3, 10) else {}
+)
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class FileMetadata:
     """Enhanced file metadata structure"""
 
@@ -108,8 +373,27 @@ class FileMetadata:
     error: Optional[str] = None
     ends_with_newline: bool = False
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Shallow field dict, in field order; cheaper than asdict.
 
-@dataclass
+        Built as a literal, since this runs for every archived file; keep
+        it in step with the fields above.
+        """
+        return {
+            "path": self.path,
+            "size": self.size,
+            "mtime": self.mtime,
+            "mode": self.mode,
+            "encoding": self.encoding,
+            "checksum": self.checksum,
+            "mime_type": self.mime_type,
+            "is_binary": self.is_binary,
+            "error": self.error,
+            "ends_with_newline": self.ends_with_newline,
+        }
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class ArchiveHeader:
     """Archive header with comprehensive metadata"""
 
@@ -125,6 +409,23 @@ class ArchiveHeader:
     command_line: str
 
 
+@dataclass
+class _Entry:
+    """Scanned file with the stat fields needed downstream cached"""
+
+    path: str
+    size: int
+    mode: int
+    mtime: float
+    relative_path: str = ""  # '/'-separated, filled in by the scan
+
+    @classmethod
+    def from_path(cls, path: Union[str, Path]) -> "_Entry":
+        """Build an entry by stat-ing a path (follows symlinks)"""
+        st = os.stat(path)
+        return cls(str(path), st.st_size, st.st_mode, st.st_mtime)
+
+
 class FileCombinerError(Exception):
     """Base exception for file combiner errors"""
 
@@ -137,6 +438,631 @@ class SecurityError(FileCombinerError):
     pass
 
 
+_GLOB_CHARS = frozenset("*?[")
+# Files above this size are checksummed through mmap; below it the mapping
+# and page-fault setup costs more than copying into the read buffer
+_MMAP_HASH_THRESHOLD = 256 * 1024
+# Byte values counted as printable by the binary sniff (tab, LF, CR, ASCII)
+_PRINTABLE_BYTES = bytes(sorted({9, 10, 13} | set(range(32, 127))))
+_TRIE_END = ""  # Marks a trie node whose whole subtree is excluded
+# Extensions always treated as text without sniffing the content
+_TEXT_EXTENSIONS = frozenset(
+    {
+        ".txt",
+        ".md",
+        ".rst",
+        ".py",
+        ".js",
+        ".html",
+        ".css",
+        ".json",
+        ".xml",
+        ".yaml",
+        ".yml",
+        ".toml",
+        ".ini",
+        ".cfg",
+        ".conf",
+        ".sh",
+        ".bash",
+        ".c",
+        ".cpp",
+        ".h",
+        ".java",
+        ".go",
+        ".rs",
+        ".rb",
+        ".pl",
+        ".php",
+        ".swift",
+        ".kt",
+        ".scala",
+        ".clj",
+        ".sql",
+        ".r",
+        ".m",
+        ".dockerfile",
+        ".makefile",
+        ".cmake",
+    }
+)
+# Extensions always treated as binary without sniffing the content
+_BINARY_EXTENSIONS = frozenset(
+    {
+        ".png",
+        ".jpg",
+        ".jpeg",
+        ".gif",
+        ".bmp",
+        ".ico",
+        ".webp",
+        ".tif",
+        ".tiff",
+        ".pdf",
+        ".zip",
+        ".gz",
+        ".tgz",
+        ".bz2",
+        ".xz",
+        ".zst",
+        ".7z",
+        ".tar",
+        ".rar",
+        ".jar",
+        ".whl",
+        ".class",
+        ".pyc",
+        ".pyo",
+        ".o",
+        ".a",
+        ".so",
+        ".dylib",
+        ".dll",
+        ".exe",
+        ".woff",
+        ".woff2",
+        ".ttf",
+        ".otf",
+        ".eot",
+        ".mp3",
+        ".mp4",
+        ".wav",
+        ".ogg",
+        ".flac",
+        ".avi",
+        ".mov",
+        ".mkv",
+        ".webm",
+        ".sqlite",
+        ".db",
+    }
+)
+# MIME types (besides image/, audio/ and video/) treated as binary
+_BINARY_MIME_TYPES = frozenset(
+    {
+        "application/octet-stream",
+        "application/pdf",
+        "application/zip",
+        "application/x-tar",
+        "application/x-7z-compressed",
+        "application/java-archive",
+        "application/wasm",
+        "application/vnd.sqlite3",
+    }
+)
+_BINARY_MIME_MAJORS = ("image/", "audio/", "video/")
+# Markdown fence language by file extension
+_LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".java": "java",
+    ".cpp": "cpp",
+    ".c": "c",
+    ".h": "c",
+    ".cs": "csharp",
+    ".php": "php",
+    ".rb": "ruby",
+    ".go": "go",
+    ".rs": "rust",
+    ".swift": "swift",
+    ".kt": "kotlin",
+    ".scala": "scala",
+    ".sh": "bash",
+    ".bash": "bash",
+    ".zsh": "zsh",
+    ".fish": "fish",
+    ".ps1": "powershell",
+    ".sql": "sql",
+    ".html": "html",
+    ".xml": "xml",
+    ".css": "css",
+    ".scss": "scss",
+    ".sass": "sass",
+    ".less": "less",
+    ".json": "json",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".toml": "toml",
+    ".ini": "ini",
+    ".cfg": "ini",
+    ".conf": "ini",
+    ".md": "markdown",
+    ".rst": "rst",
+    ".tex": "latex",
+    ".r": "r",
+    ".m": "matlab",
+    ".pl": "perl",
+    ".lua": "lua",
+    ".vim": "vim",
+    ".dockerfile": "dockerfile",
+    ".makefile": "makefile",
+}
+_OUTPUT_BUFFER_SIZE = 1024 * 1024
+# Flags for creating restored files; O_BINARY only exists on Windows
+_RESTORE_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+# Read chunk size for the txt archive parser
+_INPUT_BUFFER_SIZE = 1024 * 1024
+# Default cap on files read at once (read_concurrency)
+_DEFAULT_READ_CONCURRENCY = 8
+# Bytes peeked from the start of a txt archive to read its header
+_HEADER_PEEK_SIZE = 8 * 1024
+# Entries up to this size are buffered and written by a thread pool during
+# split; larger ones are streamed to disk
+_BUFFERED_RESTORE_SIZE = 1024 * 1024
+# Restored files of at least this size are preallocated before writing
+_PREALLOCATE_SIZE = 1024 * 1024
+# Raw bytes per base64 chunk; a multiple of 3 so chunks concatenate cleanly
+_B64_CHUNK = 57 * 1024
+# Restored files per progress bar update during split, and the longest a
+# partial batch waits before it is shown anyway (seconds)
+_PROGRESS_BATCH = 64
+_PROGRESS_INTERVAL = 0.1
+# Most bytes of upcoming files read ahead of the archive writer (a larger
+# file is still read, alone)
+_READAHEAD_BYTES = 8 * 1024 * 1024
+# Most files handed to a metadata worker thread at once
+_METADATA_BATCH = 64
+# Bytes decoded per step when validating non-ASCII text as UTF-8
+_UTF8_CHECK_CHUNK = 1024 * 1024
+# Lines joined, and characters encoded, per write when restoring str content
+_TEXT_WRITE_BATCH = 4096
+_TEXT_WRITE_CHARS = 1024 * 1024
+_ZSTD_SUFFIXES = (".zst", ".zstd")
+# ISA-L's densest level; gzip levels above it are capped for that backend
+_ISAL_MAX_LEVEL = 3
+# (gzip, zstd) levels per compression profile
+_COMPRESSION_PROFILES = {
+    "latency": (1, 3),
+    "balanced": (6, 12),
+    "archive": (9, 19),
+}
+# Inputs smaller than this compress in well under a second at any level, so
+# the balanced profile uses the latency levels for them
+_SMALL_ARCHIVE_SIZE = 16 * 1024 * 1024
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class _PatternMatcher:
+    """Glob patterns compiled once into unioned regexes.
+
+    Literal directory patterns (``node_modules/**/*``, ``.git/*``) are
+    stored in a trie of path components, literal suffix patterns
+    (``*.pyc``) in a tuple for ``str.endswith`` and patterns without any
+    glob characters (``.DS_Store``, ``src/main.py``) in sets of exact
+    basenames and paths; these are checked first. The remaining
+    full-path alternatives (``**`` globs, fnmatch globs and directory
+    prefixes) go into one regex and basename alternatives into another,
+    so a path is tested with at most two regex calls regardless of how
+    many patterns there are.
+    """
+
+    def __init__(self, patterns: List[str], logger: logging.Logger):
+        path_parts: List[str] = []
+        basename_parts: List[str] = []
+        suffixes: List[str] = []
+        names: Set[str] = set()
+        paths: Set[str] = set()
+        self._dir_trie: Dict[str, Any] = {}
+
+        for pattern in patterns:
+            literal_dir = self._literal_dir(pattern)
+            if literal_dir is None and self._is_literal(pattern):
+                # A literal matches itself (anywhere, for a bare name) and,
+                # like any directory pattern, everything below it
+                literal_dir = pattern
+                (paths if "/" in pattern else names).add(pattern)
+            if literal_dir is not None:
+                node = self._dir_trie
+                for part in literal_dir.split("/"):
+                    node = node.setdefault(part, {})
+                node[_TRIE_END] = True
+                continue
+
+            if (
+                pattern.startswith("*")
+                and len(pattern) > 1
+                and "/" not in pattern
+                and not _GLOB_CHARS.intersection(pattern[1:])
+            ):
+                # '*.pyc' matches exactly the paths ending in '.pyc'; the
+                # literal '*.pyc/' directory prefix still goes to the regex
+                suffixes.append(pattern[1:])
+                path_parts.append(re.escape(pattern) + "/.*")
+                continue
+
+            try:
+                if "**" in pattern:
+                    body = self._translate_recursive(pattern)
+                    re.compile(body)
+                    path_parts.append(body)
+                else:
+                    body = self._translate_glob(pattern)
+                    re.compile(body)
+                    path_parts.append(body)
+                    basename_parts.append(body)
+                    # Also match paths under the pattern (directory patterns)
+                    path_parts.append(re.escape(pattern.rstrip("/")) + "/.*")
+            except re.error:
+                logger.warning(f"Invalid pattern: {pattern}")
+
+        self._suffixes = tuple(suffixes)
+        self._names = frozenset(names)
+        self._paths = frozenset(paths)
+        self._path_re = self._compile_union(path_parts)
+        self._basename_re = self._compile_union(basename_parts)
+
+    @staticmethod
+    def _literal_dir(pattern: str) -> Optional[str]:
+        """Return DIR for 'DIR/**/*', 'DIR/**' or 'DIR/*' with a literal DIR"""
+        for tail in ("/**/*", "/**", "/*"):
+            if pattern.endswith(tail):
+                directory = pattern[: -len(tail)]
+                if (
+                    directory
+                    and not _GLOB_CHARS.intersection(directory)
+                    and "" not in directory.split("/")
+                ):
+                    return directory
+                return None
+        return None
+
+    def literal_dirs(self) -> List[str]:
+        """Return the directories (relative, '/'-joined) excluded as a whole"""
+        found: List[str] = []
+        stack = [("", self._dir_trie)]
+        while stack:
+            prefix, node = stack.pop()
+            for part, child in node.items():
+                if part == _TRIE_END:
+                    continue
+                if _TRIE_END in child:
+                    found.append(prefix + part)
+                else:
+                    stack.append((prefix + part + "/", child))
+        return sorted(found)
+
+    @staticmethod
+    def _is_literal(pattern: str) -> bool:
+        """Return True for a pattern without glob characters or empty parts"""
+        return (
+            bool(pattern)
+            and not _GLOB_CHARS.intersection(pattern)
+            and "" not in pattern.split("/")
+        )
+
+    def match_dir(self, relative_dir: str) -> bool:
+        """Return True if everything below the directory is excluded"""
+        node = self._dir_trie
+        if not node:
+            return False
+        for part in relative_dir.split("/"):
+            child = node.get(part)
+            if child is None:
+                return False
+            if _TRIE_END in child:
+                return True
+            node = child
+        return False
+
+    @staticmethod
+    def _translate_recursive(pattern: str) -> str:
+        """Convert a recursive glob pattern (e.g. src/**, **/*.py) to a regex"""
+        # First, escape regex special chars except * and ?
+        regex_pattern = re.escape(pattern)
+        # Use placeholders to avoid replacement conflicts
+        regex_pattern = regex_pattern.replace(r"\*\*", "\x00DSTAR\x00").replace(r"\*", "\x00STAR\x00").replace(r"\?", "\x00QUEST\x00")
+        # **/ means "zero or more directories" -> (.*/)?
+        regex_pattern = regex_pattern.replace("\x00DSTAR\x00/", "(.*/)?")
+        # ** at end or standalone matches any characters including /
+        regex_pattern = regex_pattern.replace("\x00DSTAR\x00", ".*")
+        # * matches any characters except /
+        regex_pattern = regex_pattern.replace("\x00STAR\x00", "[^/]*")
+        # ? matches single character except /
+        regex_pattern = regex_pattern.replace("\x00QUEST\x00", "[^/]")
+        return regex_pattern
+
+    @staticmethod
+    def _translate_glob(pattern: str) -> str:
+        """fnmatch.translate without the end anchor (unions are fullmatched).
+
+        Dropping ``\\Z``, which RE2 does not know, lets RE2 take the union.
+        """
+        body = fnmatch.translate(pattern)
+        return body[:-2] if body.endswith("\\Z") else body
+
+    @staticmethod
+    def _compile_union(parts: List[str]) -> Optional[Any]:
+        """Join regex bodies into a single alternation.
+
+        With RE2 installed the union runs on its linear-time automaton, so
+        many ``.*`` alternatives cannot backtrack; constructs RE2 lacks
+        (e.g. the atomic groups newer fnmatch emits) fall back to ``re``.
+        """
+        if not parts:
+            return None
+        union = "|".join(f"(?:{part})" for part in parts)
+        if HAS_RE2:
+            try:
+                return re2.compile("(?s)" + union)
+            except Exception:
+                pass
+        return re.compile(union, re.DOTALL)
+
+    def match(self, path: str) -> bool:
+        """Return True if the path matches any of the compiled patterns"""
+        if self._dir_trie:
+            node = self._dir_trie
+            for part in path.split("/")[:-1]:
+                child = node.get(part)
+                if child is None:
+                    break
+                if _TRIE_END in child:
+                    return True
+                node = child
+        if path.endswith(self._suffixes) or path in self._paths:
+            return True
+        basename = os.path.basename(path)
+        if basename in self._names:
+            return True
+        if self._path_re is not None and self._path_re.fullmatch(path):
+            return True
+        if self._basename_re is not None:
+            return self._basename_re.fullmatch(basename) is not None
+        return False
+
+
+class _Utf8Writer:
+    """Binary output sink accepting both text and pre-encoded bytes.
+
+    Headers are passed as str and encoded here; file content that is
+    already UTF-8 (or base64 ASCII) goes straight to the underlying stream.
+    """
+
+    __slots__ = ("_write", "raw")
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._write: Callable[[bytes], int] = raw.write
+
+    def write(self, data: Union[str, bytes]) -> int:
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        return self._write(data)
+
+
+class _ArchiveReader:
+    """Chunked byte reader for the txt archive parser.
+
+    Header lines are split out of a large buffer with bytes.find, and a
+    file's content is sliced out in one piece by searching for the next
+    separator line, so content is never handled line by line. Plain
+    archive files are mapped whole, so the searches run over the page
+    cache without read calls; compressed streams are read in chunks.
+    """
+
+    __slots__ = ("_f", "_buf", "_pos", "_eof", "_map")
+
+    def __init__(self, f):
+        self._f = f
+        self._buf = bytearray()
+        self._pos: int = 0
+        self._eof = False
+        self._map = None
+        if isinstance(getattr(f, "raw", f), io.FileIO):
+            try:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Empty files and special files cannot be mapped
+                pass
+            else:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    # The map is scanned once, front to back
+                    self._map.madvise(mmap.MADV_SEQUENTIAL)
+                self._buf = self._map
+                self._pos = f.tell()
+                self._eof = True
+
+    def close(self) -> None:
+        """Release the mapping of a plain archive file"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer; False once the stream ends"""
+        if self._eof:
+            return False
+        chunk = self._f.read(_INPUT_BUFFER_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        # Drop consumed bytes but keep the last one so a block search can
+        # match a separator that directly follows the previous line
+        keep = min(self._pos, 1)
+        del self._buf[: self._pos - keep]
+        self._pos = keep
+        self._buf += chunk
+        return True
+
+    def peek(self, size: int) -> bytes:
+        """Return up to ``size`` unread bytes without consuming them"""
+        while len(self._buf) - self._pos < size and self._fill():
+            pass
+        return bytes(self._buf[self._pos : self._pos + size])
+
+    def readline(self) -> Optional[bytes]:
+        """Return the next line without its line ending, or None at EOF"""
+        buf = self._buf
+        pos = self._pos
+        end = buf.find(b"\n", pos)
+        if end != -1:
+            # Fast path: the line is already buffered
+            self._pos = end + 1
+            return bytes(buf[pos:end]).rstrip(b"\r")
+
+        scanned = len(buf) - pos
+        while True:
+            end = self._buf.find(b"\n", self._pos + scanned)
+            if end != -1:
+                line = bytes(self._buf[self._pos : end])
+                self._pos = end + 1
+                return line.rstrip(b"\r")
+            scanned = len(self._buf) - self._pos
+            if not self._fill():
+                if not scanned:
+                    return None
+                line = bytes(self._buf[self._pos :])
+                self._pos = len(self._buf)
+                return line.rstrip(b"\r")
+
+    def stream_block(
+        self, marker: bytes, write: Optional[Callable[[bytes], Any]]
+    ) -> int:
+        """Pass the bytes before the next line equal to ``marker`` to ``write``.
+
+        The block is handed over in buffer-sized pieces (or skipped when
+        ``write`` is None), so memory stays bounded by the read chunk size.
+        The marker line is consumed. If the stream ends first, the rest is
+        passed on without its final newline. Returns the number of newlines
+        in the block. If ``write`` raises, the rest of the block is still
+        consumed before the error is re-raised.
+        """
+        needle = b"\n" + marker
+        newlines = 0
+        error: Optional[Exception] = None
+
+        def emit(start: int, end: int) -> None:
+            nonlocal newlines, write, error
+            if end > start:
+                piece = self._take(start, end)
+                newlines += piece.count(b"\n")
+                if write is not None:
+                    try:
+                        write(piece)
+                    except Exception as e:
+                        write = None
+                        error = e
+
+        # Offsets are relative to self._pos, which moves when _fill compacts
+        scan = -1 if self._pos else 0
+        while True:
+            buf = self._buf
+            pos = self._pos
+            i = buf.find(needle, pos + scan)
+            if i != -1:
+                end = i + len(needle)
+                if end + 2 > len(buf) and not self._eof:
+                    # Need the bytes after the marker to see the line end
+                    scan = i - pos
+                    self._fill()
+                    continue
+                if end == len(buf):
+                    after = 0
+                elif buf[end] == 0x0A:
+                    after = 1
+                elif buf[end : end + 2] == b"\r\n":
+                    after = 2
+                else:
+                    # Marker text at the start of a longer line
+                    scan = i - pos + 1
+                    continue
+                emit(pos, i)
+                self._pos = end + after
+                break
+            # Pass on everything that cannot be the start of a marker line
+            flush_end = len(buf) - len(needle)
+            if flush_end > pos:
+                emit(pos, flush_end)
+                self._pos = flush_end
+                scan = 0
+            if not self._fill():
+                buf = self._buf
+                end = len(buf)
+                if end > self._pos and buf[end - 1] == 0x0A:
+                    end -= 1
+                emit(self._pos, end)
+                self._pos = len(buf)
+                break
+
+        if error is not None:
+            raise error
+        return newlines
+
+    def _take(self, start: int, end: int) -> bytes:
+        """Copy buf[start:end] out once, without an intermediate bytearray"""
+        if end <= start:
+            return b""
+        with memoryview(self._buf) as view:
+            return view[start:end].tobytes()
+
+    def copy_to(self, dst, count: int) -> int:
+        """Copy the next ``count`` bytes into ``dst``, or skip them if None.
+
+        Bytes past the buffer are copied in-kernel when the archive is a
+        plain file. Returns the number of bytes consumed, which is short
+        only if the stream ends early.
+        """
+        if self._map is not None:
+            # The mapping mirrors the file, so copy in-kernel from the
+            # current offset
+            count = min(count, len(self._map) - self._pos)
+            if dst is not None and count:
+                dst.flush()
+                count = _copy_fd_range(
+                    self._f.fileno(), dst.fileno(), count, self._pos
+                )
+            self._pos += count
+            return count
+
+        buffered = min(count, len(self._buf) - self._pos)
+        if dst is not None and buffered:
+            dst.write(self._buf[self._pos : self._pos + buffered])
+        self._pos += buffered
+        done = buffered
+        if done == count:
+            return done
+
+        f = self._f
+        if dst is not None and isinstance(getattr(f, "raw", f), io.FileIO):
+            dst.flush()
+            offset = f.tell()
+            copied = _copy_fd_range(f.fileno(), dst.fileno(), count - done, offset)
+            f.seek(offset + copied)
+            return done + copied
+
+        buffer = _thread_buffer(_INPUT_BUFFER_SIZE)
+        while done < count:
+            n = f.readinto(buffer[: min(len(buffer), count - done)])
+            if not n:
+                self._eof = True
+                break
+            if dst is not None:
+                dst.write(buffer[:n])
+            done += n
+        return done
+
+
 class FileCombiner:
     """High-performance file combiner with advanced features"""
 
@@ -144,6 +1070,10 @@ class FileCombiner:
     METADATA_PREFIX = "FILE_METADATA:"
     ENCODING_PREFIX = "ENCODING:"
     CONTENT_PREFIX = "CONTENT:"
+    # Encoded markers for the byte-level txt parser
+    _SEPARATOR_BYTES = SEPARATOR.encode("utf-8")
+    _METADATA_PREFIX_BYTES = METADATA_PREFIX.encode("utf-8")
+    _ENCODING_PREFIX_BYTES = ENCODING_PREFIX.encode("utf-8")
 
     def __init__(self, config: Optional[Dict] = None):
         self.config = config or {}
@@ -151,8 +1081,12 @@ class FileCombiner:
         # Initialize temporary files list first (needed for cleanup in case of early errors)
         self._temp_files = []
 
-        # Initialize rich console
-        self.console = Console() if HAS_RICH else None
+        # Initialize rich console; rich is imported on first use
+        self.console: Any = None
+        if HAS_RICH:
+            from rich.console import Console
+
+            self.console = Console()
 
         self.logger = self._setup_logging()
 
@@ -165,8 +1099,32 @@ class FileCombiner:
             max_workers_config = os.cpu_count() or 4
         self.max_workers = min(max_workers_config, 32)
 
-        self.compression_level = self.config.get("compression_level", 6)
-        self.buffer_size = self.config.get("buffer_size", 64 * 1024)  # 64KB
+        # Files read at once while collecting metadata and writing; more
+        # than a few reads in flight rarely helps a single disk, while
+        # max_workers still sizes scanning and split writes
+        read_concurrency = self.config.get("read_concurrency")
+        if not read_concurrency or read_concurrency <= 0:
+            read_concurrency = min(self.max_workers, _DEFAULT_READ_CONCURRENCY)
+        self.read_concurrency = min(read_concurrency, 32)
+
+        # gzip level 1 keeps most of level 6's ratio at about twice the speed
+        self.compression_level = self.config.get("compression_level", 1)
+        self.zstd_level = self.config.get("zstd_level", 3)
+        # A profile, when set, picks both levels from the archive size
+        self.compression_profile = self.config.get("compression_profile")
+        if (
+            self.compression_profile is not None
+            and self.compression_profile not in _COMPRESSION_PROFILES
+        ):
+            raise ValueError(f"Unknown compression profile: {self.compression_profile}")
+        self.compression_backend = self.config.get("compression_backend", "auto")
+        # Used to read gzip archives; writes pick the backend again from
+        # the level they end up using (see _open_compressor)
+        self._gzip_module = self._gzip_backend(
+            self.compression_backend,
+            self._compression_levels(_SMALL_ARCHIVE_SIZE)[0],
+        )
+        self.buffer_size = self.config.get("buffer_size", 1024 * 1024)  # 1MB
         self.max_depth = self.config.get("max_depth", 50)
 
         # Pattern matching
@@ -174,12 +1132,22 @@ class FileCombiner:
             self.config.get("exclude_patterns", []) + self._default_excludes()
         )
         self.include_patterns = self.config.get("include_patterns", [])
+        self._pattern_matchers: Dict[Tuple[str, ...], _PatternMatcher] = {}
+        self._mime_cache: Dict[str, Optional[str]] = {}
+        # Parent directories already created by the current split
+        self._restored_dirs: Set[Path] = set()
+        self._refresh_pattern_matchers()
 
         # Feature flags
         self.preserve_permissions = self.config.get("preserve_permissions", False)
         self.calculate_checksums = self.config.get("calculate_checksums", False)
+        self.checksum_algorithm = self.config.get("checksum_algorithm", "sha256")
+        self._new_hasher = self._checksum_factory(self.checksum_algorithm)
         self.follow_symlinks = self.config.get("follow_symlinks", False)
         self.ignore_binary = self.config.get("ignore_binary", False)
+        # Raw binary embedding (uncompressed txt archives only)
+        self.embed_binary_raw = self.config.get("embed_binary_raw", False)
+        self._raw_binary_active = False
         self.dry_run = self.config.get("dry_run", False)
         self.verbose = self.config.get("verbose", False)
 
@@ -190,6 +1158,9 @@ class FileCombiner:
         self.respect_gitignore = self.config.get("respect_gitignore", True)
         self._gitignore_spec = None
 
+        # Cooperative cancellation flag set by the CLI's SIGINT handler
+        self._cancel_event: Optional[threading.Event] = self.config.get("cancel_event")
+
         # Signal handling for graceful cleanup
         self._setup_signal_handlers()
 
@@ -230,12 +1201,20 @@ class FileCombiner:
 
         # Only setup handlers for signals available on current platform
         try:
-            signal.signal(signal.SIGINT, signal_handler)
+            # When a cancel event is supplied the caller owns SIGINT and
+            # cancellation is delivered through _check_cancelled() instead
+            if self._cancel_event is None:
+                signal.signal(signal.SIGINT, signal_handler)
             signal.signal(signal.SIGTERM, signal_handler)
         except (ValueError, OSError):
             # Signal handling may not be available in all contexts (e.g., threads)
             pass
 
+    def _check_cancelled(self) -> None:
+        """Abort the current operation if cancellation has been requested"""
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise asyncio.CancelledError("Operation cancelled by user")
+
     def _load_gitignore(self, source_path: Path) -> None:
         """Load and parse .gitignore file from source directory"""
         if not self.respect_gitignore or not HAS_PATHSPEC:
@@ -249,6 +1228,8 @@ class FileCombiner:
             with open(gitignore_path, "r", encoding="utf-8") as f:
                 gitignore_content = f.read()
 
+            import pathspec
+
             # Parse gitignore patterns
             self._gitignore_spec = pathspec.PathSpec.from_lines(
                 pathspec.patterns.GitWildMatchPattern,
@@ -290,18 +1271,51 @@ class FileCombiner:
 
             self.logger.info(f"Cloning GitHub repository: {github_url}")
 
-            # Clone the repository
-            result = subprocess.run(
-                ["git", "clone", "--depth", "1", github_url, str(temp_dir)],
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 minute timeout
-            )
+            def run_git(*args: str) -> subprocess.CompletedProcess:
+                return subprocess.run(
+                    ["git", "-c", "protocol.version=2", *args],
+                    capture_output=True,
+                    text=True,
+                    timeout=300,  # 5 minute timeout
+                )
 
+            # Clone only the tip commit's history and trees; file contents
+            # are fetched by the checkout below, and only for paths that
+            # are not excluded as a whole (node_modules, build, ...)
+            result = run_git(
+                "clone",
+                "--depth",
+                "1",
+                "--single-branch",
+                "--no-tags",
+                "--filter=blob:none",
+                "--no-checkout",
+                github_url,
+                str(temp_dir),
+            )
             if result.returncode != 0:
                 self.logger.error(f"Failed to clone repository: {result.stderr}")
                 return None
 
+            sparse_patterns = self._sparse_checkout_patterns()
+            if sparse_patterns:
+                result = run_git(
+                    "-C",
+                    str(temp_dir),
+                    "sparse-checkout",
+                    "set",
+                    "--no-cone",
+                    *sparse_patterns,
+                )
+                if result.returncode != 0 and self.verbose:
+                    # Older Git: fall back to checking out everything
+                    self.logger.debug(f"Sparse checkout unavailable: {result.stderr}")
+
+            result = run_git("-C", str(temp_dir), "checkout")
+            if result.returncode != 0:
+                self.logger.error(f"Failed to check out repository: {result.stderr}")
+                return None
+
             self.logger.info(f"Successfully cloned to: {temp_dir}")
             return temp_dir
 
@@ -317,6 +1331,19 @@ class FileCombiner:
             self.logger.error(f"Error cloning repository: {e}")
             return None
 
+    def _sparse_checkout_patterns(self) -> List[str]:
+        """Sparse-checkout rules leaving out directories excluded as a whole.
+
+        Returns an empty list when nothing can be left out.
+        """
+        skipped = [
+            f"!/{directory}/"
+            for directory in self._exclude_matcher.literal_dirs()
+            # Backslashes and trailing spaces mean something else to Git
+            if "\\" not in directory and not directory.endswith(" ")
+        ]
+        return ["/*"] + skipped if skipped else []
+
     def _detect_output_format(
         self, output_path: Path, format_arg: Optional[str] = None
     ) -> str:
@@ -344,7 +1371,8 @@ class FileCombiner:
     ) -> bool:
         """Validate that format is compatible with output path and compression"""
         # Check if compression is requested with incompatible formats
-        is_compressed = output_path.suffix.lower() == ".gz"
+        suffix = output_path.suffix.lower()
+        is_compressed = suffix == ".gz" or suffix in _ZSTD_SUFFIXES
 
         if is_compressed and format_type in ["xml", "json", "markdown", "yaml"]:
             self.logger.warning(
@@ -452,37 +1480,29 @@ class FileCombiner:
         if not patterns:
             return False
 
-        for pattern in patterns:
-            try:
-                if "**" in pattern:
-                    # Handle recursive glob patterns (e.g., src/**, **/*.py)
-                    # Convert glob pattern to regex properly
-                    # First, escape regex special chars except * and ?
-                    regex_pattern = re.escape(pattern)
-                    # Use placeholders to avoid replacement conflicts
-                    regex_pattern = regex_pattern.replace(r"\*\*", "\x00DSTAR\x00").replace(r"\*", "\x00STAR\x00").replace(r"\?", "\x00QUEST\x00")
-                    # **/ means "zero or more directories" -> (.*/)?
-                    regex_pattern = regex_pattern.replace("\x00DSTAR\x00/", "(.*/)?")
-                    # ** at end or standalone matches any characters including /
-                    regex_pattern = regex_pattern.replace("\x00DSTAR\x00", ".*")
-                    # * matches any characters except /
-                    regex_pattern = regex_pattern.replace("\x00STAR\x00", "[^/]*")
-                    # ? matches single character except /
-                    regex_pattern = regex_pattern.replace("\x00QUEST\x00", "[^/]")
-                    if re.match(f"^{regex_pattern}$", path):
-                        return True
-                elif fnmatch.fnmatch(path, pattern):
-                    return True
-                elif fnmatch.fnmatch(os.path.basename(path), pattern):
-                    return True
-                # Also check if path starts with pattern (for directory patterns)
-                elif path.startswith(pattern.rstrip("/") + "/"):
-                    return True
-            except re.error:
-                self.logger.warning(f"Invalid pattern: {pattern}")
-                continue
+        return self._get_pattern_matcher(patterns).match(path)
 
-        return False
+    def _get_pattern_matcher(self, patterns: List[str]) -> "_PatternMatcher":
+        """Return the compiled matcher for a pattern list, compiling on first use"""
+        key = tuple(patterns)
+        matcher = self._pattern_matchers.get(key)
+        if matcher is None:
+            matcher = _PatternMatcher(patterns, self.logger)
+            self._pattern_matchers[key] = matcher
+        return matcher
+
+    def _refresh_pattern_matchers(self) -> None:
+        """Resolve the matchers used per file after the pattern lists change.
+
+        Keeps the per-file exclusion check from re-hashing the pattern
+        tuple to look its matcher up on every call.
+        """
+        self._exclude_matcher = self._get_pattern_matcher(self.exclude_patterns)
+        self._include_matcher = (
+            self._get_pattern_matcher(self.include_patterns)
+            if self.include_patterns
+            else None
+        )
 
     def _normalize_patterns(self, patterns: List[str], source_path: Path, pattern_type: str = "include") -> List[str]:
         """Normalize patterns to be relative to source directory.
@@ -570,121 +1590,211 @@ class FileCombiner:
 
         return normalized
 
-    def _should_exclude(self, file_path: Path, relative_path: str) -> Tuple[bool, str]:
+    def _should_exclude(
+        self, file_entry: Union[_Entry, Path], relative_path: str
+    ) -> Tuple[bool, str]:
         """Advanced pattern matching for file exclusion with comprehensive checks"""
         try:
-            # Validate path
-            if not file_path.exists():
-                return True, "file does not exist"
-
-            file_stat = file_path.stat()
-
-            # Check file size
-            if file_stat.st_size > self.max_file_size:
-                return True, f"too large ({self._format_size(file_stat.st_size)})"
-
-            # Check gitignore patterns first (most common exclusion source)
-            if self._matches_gitignore(relative_path):
-                return True, "matches .gitignore pattern"
+            # Cheapest checks first: the compiled matchers (trie, sets,
+            # suffixes, regex) need only the path, so they run before
+            # anything touches the stat; the per-pattern .gitignore spec
+            # comes last
 
             # Check exclude patterns
-            if self._matches_pattern(relative_path, self.exclude_patterns):
+            if self._exclude_matcher.match(relative_path):
                 return True, "matches exclude pattern"
 
             # Check include patterns (if specified)
-            if self.include_patterns and not self._matches_pattern(
-                relative_path, self.include_patterns
+            if self._include_matcher is not None and not self._include_matcher.match(
+                relative_path
             ):
                 return True, "doesn't match include pattern"
 
+            if not isinstance(file_entry, _Entry):
+                # A missing file surfaces as FileNotFoundError from the stat
+                file_entry = _Entry.from_path(file_entry)
+
+            # Check file size
+            if file_entry.size > self.max_file_size:
+                return True, f"too large ({self._format_size(file_entry.size)})"
+
             # Check if it's a special file (socket, device, etc.)
-            if not file_stat.st_mode & (stat.S_IFREG | stat.S_IFLNK):
+            if not file_entry.mode & (stat.S_IFREG | stat.S_IFLNK):
                 return True, "not a regular file or symlink"
 
+            # Check gitignore patterns
+            if self._matches_gitignore(relative_path):
+                return True, "matches .gitignore pattern"
+
             return False, ""
 
+        except FileNotFoundError:
+            return True, "file does not exist"
         except (OSError, PermissionError) as e:
             return True, f"cannot access: {e}"
 
-    def _is_binary(self, file_path: Path) -> bool:
-        """Efficient binary file detection with comprehensive checks"""
+    def _is_text_by_name(
+        self, file_path: Union[str, Path], mime_type: Optional[str] = None
+    ) -> bool:
+        """Fast path: decide a file is text from its extension or MIME type.
+
+        ``mime_type`` may be passed when it is already known (e.g. from the
+        file's metadata) to skip the lookup.
+        """
+        if os.path.splitext(file_path)[1].lower() in _TEXT_EXTENSIONS:
+            return True
+
+        # Check MIME type
+        if mime_type is None:
+            mime_type = self._guess_mime_type(os.fspath(file_path))
+        return bool(mime_type and mime_type.startswith("text/"))
+
+    def _is_binary_by_name(
+        self, file_path: Union[str, Path], mime_type: Optional[str] = None
+    ) -> bool:
+        """Fast path: decide a file is binary from its extension or MIME type.
+
+        Only a file that neither this nor ``_is_text_by_name`` can place
+        needs its content sniffed.
+        """
+        if os.path.splitext(file_path)[1].lower() in _BINARY_EXTENSIONS:
+            return True
+
+        if mime_type is None:
+            mime_type = self._guess_mime_type(os.fspath(file_path))
+        if not mime_type:
+            return False
+        if mime_type.startswith(_BINARY_MIME_MAJORS):
+            # image/svg+xml and friends are XML text
+            return not mime_type.endswith("+xml")
+        return mime_type in _BINARY_MIME_TYPES
+
+    def _guess_mime_type(self, path: str) -> Optional[str]:
+        """mimetypes.guess_type(path)[0], memoized per file extension"""
+        ext = os.path.splitext(path)[1]
+        for candidate in (ext, ext.lower()):
+            if candidate in mimetypes.suffix_map or candidate in mimetypes.encodings_map:
+                # Compound suffixes such as .tar.gz depend on more than the extension
+                return mimetypes.guess_type(path)[0]
         try:
-            # First check by extension (fast path)
-            text_extensions = {
-                ".txt",
-                ".md",
-                ".rst",
-                ".py",
-                ".js",
-                ".html",
-                ".css",
-                ".json",
-                ".xml",
-                ".yaml",
-                ".yml",
-                ".toml",
-                ".ini",
-                ".cfg",
-                ".conf",
-                ".sh",
-                ".bash",
-                ".c",
-                ".cpp",
-                ".h",
-                ".java",
-                ".go",
-                ".rs",
-                ".rb",
-                ".pl",
-                ".php",
-                ".swift",
-                ".kt",
-                ".scala",
-                ".clj",
-                ".sql",
-                ".r",
-                ".m",
-                ".dockerfile",
-                ".makefile",
-                ".cmake",
-            }
+            return self._mime_cache[ext]
+        except KeyError:
+            mime_type = mimetypes.guess_type(path)[0]
+            self._mime_cache[ext] = mime_type
+            return mime_type
+
+    def _is_binary_sample(self, chunk: bytes) -> bool:
+        """Classify a sample of file content as binary or text"""
+        if not chunk:
+            return False
 
-            if file_path.suffix.lower() in text_extensions:
-                return False
+        # Strip printable bytes in C; what remains is the non-printable set
+        non_printable = chunk.translate(None, _PRINTABLE_BYTES)
+        if not non_printable:
+            return False
 
-            # Check MIME type
-            mime_type, _ = mimetypes.guess_type(str(file_path))
-            if mime_type and mime_type.startswith("text/"):
+        # Check for null bytes (strong indicator of binary)
+        if b"\0" in non_printable:
+            return True
+
+        # Check for high ratio of non-printable characters
+        ratio = (len(chunk) - len(non_printable)) / len(chunk)
+
+        # Files with less than 70% printable characters are likely binary
+        return ratio < 0.7
+
+    def _is_binary(self, file_path: Union[str, Path], file_size: Optional[int] = None) -> bool:
+        """Efficient binary file detection with comprehensive checks"""
+        try:
+            # First check by extension and MIME type (fast path)
+            if self._is_text_by_name(file_path):
                 return False
 
             # Check file content (sample first chunk)
-            file_size = file_path.stat().st_size
+            if file_size is None:
+                file_size = os.stat(file_path).st_size
             if file_size == 0:
                 return False  # Empty files are considered text
+            if self._is_binary_by_name(file_path):
+                return True
 
             sample_size = min(8192, file_size)
             with open(file_path, "rb") as f:
                 chunk = f.read(sample_size)
 
-            if not chunk:
-                return False
+            return self._is_binary_sample(chunk)
+
+        except (OSError, PermissionError):
+            # If we can't read it, assume it's binary for safety
+            return True
+
+    def _classify_and_read(
+        self, file_path: Union[str, Path], mime_type: Optional[str] = None
+    ) -> Tuple[bool, bytes]:
+        """Read a file with a single open and classify it as text or binary.
+
+        The binary sniff runs on the first 8 KiB of the bytes already read,
+        so detection does not need to open the file a second time.
+        """
+        with open(file_path, "rb") as f:
+            data = f.read()
+
+        if not data or self._is_text_by_name(file_path, mime_type):
+            return False, data
+        if self._is_binary_by_name(file_path, mime_type):
+            return True, data
+        return self._is_binary_sample(data[:8192]), data
 
-            # Check for null bytes (strong indicator of binary)
-            if b"\0" in chunk:
+    def _sniff_raw_binary(self, file_path: Union[str, Path], metadata: FileMetadata) -> bool:
+        """Decide whether a file is embedded raw, reading at most its first 8 KiB.
+
+        The size in the metadata is refreshed from the open file so the
+        length written to the archive matches what is copied afterwards.
+        """
+        if self._is_text_by_name(file_path, metadata.mime_type):
+            return False
+        with open(file_path, "rb") as f:
+            if self._is_binary_by_name(file_path, metadata.mime_type):
+                # Known binary formats skip the sniff; only emptiness matters
+                size = os.fstat(f.fileno()).st_size
+                if not size:
+                    return False
+                metadata.size = size
                 return True
+            head = f.read(8192)
+            if not head or not self._is_binary_sample(head):
+                return False
+            metadata.size = os.fstat(f.fileno()).st_size
+        return True
 
-            # Check for high ratio of non-printable characters
-            printable_chars = sum(
-                1 for byte in chunk if 32 <= byte <= 126 or byte in (9, 10, 13)
-            )
-            ratio = printable_chars / len(chunk)
+    def _start_rich_progress(self):
+        """Start a rich progress display with the standard file columns"""
+        from rich.progress import (
+            BarColumn,
+            MofNCompleteColumn,
+            Progress,
+            SpinnerColumn,
+            TextColumn,
+            TimeElapsedColumn,
+        )
 
-            # Files with less than 70% printable characters are likely binary
-            return ratio < 0.7
+        progress_bar = Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            MofNCompleteColumn(),
+            TimeElapsedColumn(),
+            console=self.console,
+        )
+        progress_bar.start()
+        return progress_bar
 
-        except (OSError, PermissionError):
-            # If we can't read it, assume it's binary for safety
-            return True
+    @staticmethod
+    def _tqdm_progress(total: Optional[int], description: str):
+        """Create a tqdm progress bar counting files"""
+        from tqdm import tqdm
+
+        return tqdm(total=total, desc=description, unit="files")
 
     def _format_size(self, size: int) -> str:
         """Format size in human-readable format"""
@@ -697,7 +1807,7 @@ class FileCombiner:
             size /= 1024.0
         return f"{size:.1f}PB"
 
-    def _dry_run_combine(self, all_files: List[Path], source_path: Path) -> bool:
+    def _dry_run_combine(self, all_files: List[_Entry], source_path: Path) -> bool:
         """Perform a comprehensive dry run"""
         try:
             self.logger.info("DRY RUN - Files that would be processed:")
@@ -706,11 +1816,14 @@ class FileCombiner:
             processed_count = 0
             skipped_count = 0
 
-            for file_path in all_files:
+            for entry in all_files:
                 try:
-                    relative_path = str(file_path.relative_to(source_path))
+                    file_path = entry.path
+                    relative_path = self._entry_relative_path(entry, source_path)
+                    if relative_path is None:
+                        raise ValueError(f"{file_path} is not under {source_path}")
                     should_exclude, reason = self._should_exclude(
-                        file_path, relative_path
+                        entry, relative_path
                     )
 
                     if should_exclude:
@@ -723,8 +1836,8 @@ class FileCombiner:
                                 print(f"  ✗ {relative_path} ({reason})")
                         skipped_count += 1
                     else:
-                        file_size = file_path.stat().st_size
-                        is_binary = self._is_binary(file_path)
+                        file_size = entry.size
+                        is_binary = self._is_binary(file_path, file_size)
                         file_type = "binary" if is_binary else "text"
                         if HAS_RICH and self.console:
                             self.console.print(
@@ -850,6 +1963,8 @@ class FileCombiner:
                     if self.verbose:
                         self.logger.debug(f"Exclude patterns: {original_exclude} -> {normalized_excludes}")
 
+            self._refresh_pattern_matchers()
+
             # Load .gitignore if present and enabled
             if self.respect_gitignore:
                 self._load_gitignore(source_path)
@@ -870,94 +1985,50 @@ class FileCombiner:
             # Phase 1: Collect metadata in parallel (memory-efficient)
             # Only stores (metadata, file_path) tuples - NOT file content
             # This keeps memory usage O(n) for metadata but O(1) for content
-            file_entries: List[Tuple[FileMetadata, Path]] = []
+            file_entries: List[Tuple[FileMetadata, str]] = []
 
-            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                future_to_file = {
-                    executor.submit(
-                        self._collect_file_metadata, file_path, source_path
-                    ): file_path
-                    for file_path in all_files
-                }
-
-                # Collect metadata with progress bar
-                # Disable rich/tqdm progress bars in non-TTY environments (CI/CD)
-                use_rich_progress = progress and HAS_RICH and self.console and self.is_tty
-                use_tqdm_progress = progress and HAS_TQDM and tqdm and self.is_tty and not use_rich_progress
-
-                completed_count = 0
-                if use_rich_progress:
-                    with Progress(
-                        SpinnerColumn(),
-                        TextColumn("[progress.description]{task.description}"),
-                        BarColumn(),
-                        MofNCompleteColumn(),
-                        TimeElapsedColumn(),
-                        console=self.console,
-                    ) as progress_bar:
-                        task = progress_bar.add_task(
-                            "Collecting metadata", total=len(all_files)
-                        )
+            results = self._iter_file_metadata(all_files, source_path)
 
-                        for future in as_completed(future_to_file):
-                            completed_count += 1
-                            try:
-                                result = future.result()
-                                if result:
-                                    file_entries.append(result)
-                            except Exception as e:
-                                file_path = future_to_file[future]
-                                self.logger.error(f"Error processing {file_path}: {e}")
-                                self.stats["errors"] += 1
-
-                            progress_bar.update(task, advance=1)
-                elif use_tqdm_progress:
-                    pbar = tqdm(
-                        total=len(all_files), desc="Collecting metadata", unit="files"
-                    )
-                    for future in as_completed(future_to_file):
-                        completed_count += 1
-                        try:
-                            result = future.result()
-                            if result:
-                                file_entries.append(result)
-                        except Exception as e:
-                            file_path = future_to_file[future]
-                            self.logger.error(f"Error processing {file_path}: {e}")
-                            self.stats["errors"] += 1
+            # Collect metadata with progress bar
+            # Disable rich/tqdm progress bars in non-TTY environments (CI/CD)
+            use_rich_progress = progress and HAS_RICH and self.console and self.is_tty
+            use_tqdm_progress = progress and HAS_TQDM and self.is_tty and not use_rich_progress
+
+            completed_count = 0
+            progress_bar = None
+            task = None
+            pbar = None
+            if use_rich_progress:
+                progress_bar = self._start_rich_progress()
+                task = progress_bar.add_task(
+                    "Collecting metadata", total=len(all_files)
+                )
+            elif use_tqdm_progress:
+                pbar = self._tqdm_progress(len(all_files), "Collecting metadata")
+            elif progress:
+                print(f"Collecting metadata for {len(all_files)} files...")
+
+            try:
+                async for result in results:
+                    completed_count += 1
+                    if result:
+                        file_entries.append(result)
+                    if progress_bar is not None:
+                        progress_bar.update(task, advance=1)
+                    elif pbar is not None:
                         pbar.update(1)
+                    elif progress and completed_count % 50 == 0:
+                        print(
+                            f"Collected {completed_count}/{len(all_files)} files...",
+                            end="\r",
+                        )
+            finally:
+                if progress_bar is not None:
+                    progress_bar.stop()
+                elif pbar is not None:
                     pbar.close()
-                elif progress:
-                    print(f"Collecting metadata for {len(all_files)} files...")
-                    for future in as_completed(future_to_file):
-                        completed_count += 1
-                        try:
-                            result = future.result()
-                            if result:
-                                file_entries.append(result)
-                        except Exception as e:
-                            file_path = future_to_file[future]
-                            self.logger.error(f"Error processing {file_path}: {e}")
-                            self.stats["errors"] += 1
-
-                        if completed_count % 50 == 0:
-                            print(
-                                f"Collected {completed_count}/{len(all_files)} files...",
-                                end="\r",
-                            )
-                    print(f"\nCollected metadata for {completed_count}/{len(all_files)} files")
-                else:
-                    # No progress display
-                    for future in as_completed(future_to_file):
-                        completed_count += 1
-                        try:
-                            result = future.result()
-                            if result:
-                                file_entries.append(result)
-                        except Exception as e:
-                            file_path = future_to_file[future]
-                            self.logger.error(f"Error processing {file_path}: {e}")
-                            self.stats["errors"] += 1
+            if progress and progress_bar is None and pbar is None:
+                print(f"\nCollected metadata for {completed_count}/{len(all_files)} files")
 
             if not file_entries:
                 self.logger.error("No files were successfully processed")
@@ -967,9 +2038,15 @@ class FileCombiner:
             file_entries.sort(key=lambda x: x[0].path)
 
             # Phase 2: Write archive with streaming (O(1) memory for content)
-            # Content is read on-demand for each file, not held in memory
-            success = await self._write_archive_streaming(
-                output_path, source_path, file_entries, compress, detected_format
+            # Content is read on-demand for each file, not held in memory;
+            # the whole write runs as one blocking call on a worker thread
+            success: bool = await run_in_thread(
+                self._write_archive_streaming,
+                output_path,
+                source_path,
+                file_entries,
+                compress,
+                detected_format,
             )
 
             if success:
@@ -996,151 +2073,236 @@ class FileCombiner:
         finally:
             self._cleanup_temp_files()
 
-    def _scan_directory(self, source_path: Path) -> List[Path]:
-        """Scan directory with depth control and error handling"""
-        files = []
+    def _scan_directory(self, source_path: Path) -> List[_Entry]:
+        """Scan directory with depth control and error handling.
+
+        Directories are listed with os.scandir on up to max_workers threads
+        (the listing and stat calls release the GIL), each file's stat
+        result is recorded once for later phases, and the result is sorted
+        so the order does not depend on thread scheduling. Files matching
+        an exclude pattern are listed without being stat-ed.
+        """
+        files: List[_Entry] = []
         visited_dirs = set()  # Prevent infinite loops with symlinks
+        visited_lock = threading.Lock()
+        exclude_matcher = self._exclude_matcher
+
+        def list_directory(
+            current_path: str, prefix: str, depth: int
+        ) -> Tuple[List[_Entry], List[Tuple[str, str, int]]]:
+            """List one directory, returning its files and subdirectories"""
+            found: List[_Entry] = []
+            subdirs: List[Tuple[str, str, int]] = []
+            self._check_cancelled()
 
-        def scan_recursive(current_path: Path, depth: int = 0) -> None:
             if depth > self.max_depth:
                 self.logger.warning(
                     f"Maximum depth ({self.max_depth}) reached at {current_path}"
                 )
-                return
+                return found, subdirs
 
-            # Prevent infinite loops
+            # Prevent infinite loops: a directory is identified by its
+            # (device, inode) pair, which costs one stat instead of the
+            # per-component lstat chain of realpath
             try:
-                real_path = current_path.resolve()
-                if real_path in visited_dirs:
-                    return
-                visited_dirs.add(real_path)
-            except (OSError, RuntimeError):
-                return
+                st = os.stat(current_path)
+            except OSError:
+                return found, subdirs
+            if st.st_ino:
+                dir_key: Union[Tuple[int, int], str] = (st.st_dev, st.st_ino)
+            else:
+                # Some filesystems (e.g. FAT on Windows) report no inode
+                dir_key = os.path.realpath(current_path)
+            with visited_lock:
+                if dir_key in visited_dirs:
+                    return found, subdirs
+                visited_dirs.add(dir_key)
 
             try:
-                items = list(current_path.iterdir())
-                items.sort()  # Consistent ordering
-
-                for item in items:
-                    try:
-                        if item.is_file():
-                            files.append(item)
-                        elif item.is_dir():
-                            if self.follow_symlinks or not item.is_symlink():
-                                scan_recursive(item, depth + 1)
-                    except (OSError, PermissionError) as e:
-                        if self.verbose:
-                            self.logger.warning(f"Cannot access {item}: {e}")
-                        continue
+                with os.scandir(current_path) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_file():
+                                relative_file = prefix + entry.name
+                                if exclude_matcher.match(relative_file):
+                                    # Rejected by _should_exclude before it
+                                    # reads the stat fields, so skip the stat
+                                    found.append(
+                                        _Entry(entry.path, 0, 0, 0.0, relative_file)
+                                    )
+                                    continue
+                                st = entry.stat()
+                                found.append(
+                                    _Entry(
+                                        entry.path,
+                                        st.st_size,
+                                        st.st_mode,
+                                        st.st_mtime,
+                                        relative_file,
+                                    )
+                                )
+                            elif entry.is_dir():
+                                relative_dir = prefix + entry.name
+                                # Prune subtrees excluded as a whole (.git, node_modules, ...)
+                                if exclude_matcher.match_dir(relative_dir):
+                                    continue
+                                if self.follow_symlinks or not entry.is_symlink():
+                                    subdirs.append(
+                                        (entry.path, relative_dir + "/", depth + 1)
+                                    )
+                        except (OSError, PermissionError) as e:
+                            if self.verbose:
+                                self.logger.warning(f"Cannot access {entry.path}: {e}")
+                            continue
 
             except (OSError, PermissionError) as e:
                 self.logger.warning(f"Cannot scan directory {current_path}: {e}")
 
-        scan_recursive(source_path)
-        return files
+            return found, subdirs
 
-    def _process_file_worker(
-        self, file_path: Path, source_path: Path
-    ) -> Optional[Tuple[FileMetadata, bytes]]:
-        """Process single file with comprehensive error handling"""
-        try:
-            relative_path = str(file_path.relative_to(source_path))
-
-            # Check if file should be excluded
-            should_exclude, reason = self._should_exclude(file_path, relative_path)
-            if should_exclude:
-                if self.verbose:
-                    self.logger.debug(f"Excluding {relative_path}: {reason}")
-                self.stats["files_skipped"] += 1
-                return None
-
-            # Get file stats
-            file_stat = file_path.stat()
-            is_binary = self._is_binary(file_path)
-
-            # Create metadata
-            metadata = FileMetadata(
-                path=relative_path,
-                size=file_stat.st_size,
-                mtime=file_stat.st_mtime,
-                mode=file_stat.st_mode,
-                is_binary=is_binary,
-                encoding="base64" if is_binary else "utf-8",
-                mime_type=mimetypes.guess_type(str(file_path))[0],
-            )
+        root = (str(source_path), "", 0)
+        if self.max_workers <= 1:
+            stack = [root]
+            while stack:
+                found, subdirs = list_directory(*stack.pop())
+                files.extend(found)
+                stack.extend(reversed(subdirs))
+        else:
+            # Each listed directory hands its subdirectories back through a
+            # queue, so scheduling stays O(1) per directory
+            done: queue.Queue[Future] = queue.Queue()
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                executor.submit(list_directory, *root).add_done_callback(done.put)
+                outstanding = 1
+                while outstanding:
+                    found, subdirs = done.get().result()
+                    outstanding -= 1
+                    files.extend(found)
+                    for subdir in subdirs:
+                        executor.submit(list_directory, *subdir).add_done_callback(
+                            done.put
+                        )
+                        outstanding += 1
 
-            # Add checksum if requested
-            if self.calculate_checksums:
-                metadata.checksum = self._calculate_checksum(file_path)
+        files.sort(key=lambda entry: entry.path)  # Consistent ordering
+        return files
 
-            # Read file content with proper encoding handling
-            content = self._read_file_content(file_path, metadata)
-            if content is None:
-                self.stats["errors"] += 1
-                return None
+    async def _iter_file_metadata(
+        self, all_files: List[_Entry], source_path: Path
+    ) -> AsyncIterator[Optional[Tuple[FileMetadata, str]]]:
+        """Yield the metadata result for every scanned file as it completes.
 
-            self.stats["files_processed"] += 1
-            self.stats["bytes_processed"] += metadata.size
+        Metadata comes from the stat cached during the scan, so it is built
+        inline unless binary filtering has to sniff the files. Those reads
+        run on read_concurrency worker tasks pulling batches from one
+        shared iterator, so there is one thread hop per batch rather than
+        one executor future per file.
+        """
+        if not self.ignore_binary:
+            for entry in all_files:
+                yield self._collect_file_metadata(entry, source_path)
+            return
 
-            if self.verbose:
-                self.logger.debug(
-                    f"Processed {relative_path} ({self._format_size(metadata.size)})"
-                )
+        queue: asyncio.Queue = asyncio.Queue()
+        pending = iter(all_files)
+        # About four batches per worker, capped so progress stays smooth
+        batch_size = max(
+            1, min(_METADATA_BATCH, len(all_files) // (self.read_concurrency * 4))
+        )
 
-            return (metadata, content)
+        def collect_batch(
+            batch: List[_Entry],
+        ) -> List[Optional[Tuple[FileMetadata, str]]]:
+            results = []
+            for entry in batch:
+                try:
+                    results.append(self._collect_file_metadata(entry, source_path))
+                except Exception as e:
+                    self.logger.error(f"Error processing {entry.path}: {e}")
+                    self.stats["errors"] += 1
+                    results.append(None)
+            return results
+
+        async def worker() -> None:
+            while True:
+                batch = list(itertools.islice(pending, batch_size))
+                if not batch:
+                    return
+                try:
+                    results = await run_in_thread(collect_batch, batch)
+                except BaseException as e:
+                    # Hand cancellation to the consumer instead of stalling it
+                    queue.put_nowait(e)
+                    raise
+                for result in results:
+                    queue.put_nowait(result)
 
-        except Exception as e:
-            self.logger.error(f"Error processing {file_path}: {e}")
-            self.stats["errors"] += 1
+        workers = [
+            asyncio.ensure_future(worker())
+            for _ in range(min(self.read_concurrency, len(all_files)))
+        ]
+        try:
+            for _ in range(len(all_files)):
+                result = await queue.get()
+                if isinstance(result, BaseException):
+                    raise result
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+
+    def _entry_relative_path(self, entry: _Entry, base_path: Path) -> Optional[str]:
+        """Return the '/'-separated path of an entry relative to base_path"""
+        if entry.relative_path:
+            return entry.relative_path
+        prefix = os.path.join(str(base_path), "")
+        if not entry.path.startswith(prefix) or len(entry.path) == len(prefix):
             return None
+        return entry.path[len(prefix) :].replace("\\", "/")
 
     def _collect_file_metadata(
-        self, file_path: Path, base_path: Path
-    ) -> Optional[Tuple[FileMetadata, Path]]:
+        self, entry: _Entry, base_path: Path
+    ) -> Optional[Tuple[FileMetadata, str]]:
         """
         Collect file metadata without reading content (memory-efficient).
 
         Returns (metadata, file_path) tuple for streaming write phase.
         Content is read on-demand during write to maintain O(1) memory usage.
         """
+        self._check_cancelled()
+        # Kept as str: a Path per file costs more than the rest of this step
+        file_path = entry.path
         try:
-            # Calculate relative path
-            try:
-                relative_path = str(file_path.relative_to(base_path))
-            except ValueError:
+            relative_path = self._entry_relative_path(entry, base_path)
+            if relative_path is None:
                 self.logger.warning(f"Cannot determine relative path for {file_path}")
                 return None
 
-            # Normalize path separators
-            relative_path = relative_path.replace("\\", "/")
-
             # Apply include/exclude filters
-            should_exclude, reason = self._should_exclude(file_path, relative_path)
+            should_exclude, reason = self._should_exclude(entry, relative_path)
             if should_exclude:
                 if self.verbose:
                     self.logger.debug(f"Excluding {relative_path}: {reason}")
                 self.stats["files_skipped"] += 1
                 return None
 
-            # Get file stats
-            file_stat = file_path.stat()
-            is_binary = self._is_binary(file_path)
+            # Binary detection happens when the content is read; only sniff
+            # here when binary files have to be filtered out up front
+            if self.ignore_binary and self._is_binary(file_path, entry.size):
+                if self.verbose:
+                    self.logger.debug(f"Excluding {relative_path}: binary file")
+                self.stats["files_skipped"] += 1
+                return None
 
-            # Create metadata
+            # Create metadata from the stat cached during the scan
             metadata = FileMetadata(
                 path=relative_path,
-                size=file_stat.st_size,
-                mtime=file_stat.st_mtime,
-                mode=file_stat.st_mode,
-                is_binary=is_binary,
-                encoding="base64" if is_binary else "utf-8",
-                mime_type=mimetypes.guess_type(str(file_path))[0],
+                size=entry.size,
+                mtime=entry.mtime,
+                mode=entry.mode,
+                mime_type=self._guess_mime_type(entry.path),
             )
 
-            # Add checksum if requested
-            if self.calculate_checksums:
-                metadata.checksum = self._calculate_checksum(file_path)
-
             self.stats["files_processed"] += 1
             self.stats["bytes_processed"] += metadata.size
 
@@ -1157,122 +2319,138 @@ class FileCombiner:
             return None
 
     def _read_file_content(
-        self, file_path: Path, metadata: FileMetadata
+        self, file_path: Union[str, Path], metadata: FileMetadata
     ) -> Optional[bytes]:
-        """Read file content with robust encoding detection"""
-        try:
-            if metadata.is_binary:
-                # Read binary files and encode as base64
-                with open(file_path, "rb") as f:
-                    content = f.read()
-                return base64.b64encode(content)
-            else:
-                # Try multiple encodings for text files
-                encodings = ["utf-8", "utf-8-sig", "latin1", "cp1252", "iso-8859-1"]
-
-                for encoding in encodings:
-                    try:
-                        with open(
-                            file_path, "r", encoding=encoding, errors="strict"
-                        ) as f:
-                            content = f.read()
-
-                        # Track whether the file ends with a newline
-                        metadata.ends_with_newline = content.endswith("\n")
-                        metadata.encoding = encoding
-                        return content.encode("utf-8")
-                    except (UnicodeDecodeError, UnicodeError):
-                        continue
+        """Read file content with robust encoding detection.
 
-                # If all text encodings fail, treat as binary
-                self.logger.warning(
-                    f"Cannot decode {file_path} as text, treating as binary"
-                )
-                with open(file_path, "rb") as f:
-                    content = f.read()
+        Opens the file once, classifies it from the bytes read and updates
+        ``metadata.is_binary``/``metadata.encoding`` accordingly. Text comes
+        back as UTF-8; binary files come back raw and are base64 encoded by
+        the writers straight into the output. A requested checksum is taken
+        from the same bytes, so the file is not read a second time.
+        """
+        try:
+            if self._raw_binary_active and self._sniff_raw_binary(file_path, metadata):
+                # Copied straight from disk into the archive by the writer
                 metadata.is_binary = True
-                metadata.encoding = "base64"
-                return base64.b64encode(content)
-
+                metadata.encoding = "raw"
+                if self.calculate_checksums:
+                    metadata.checksum = self._calculate_checksum(file_path)
+                return b""
+            is_binary, raw = self._classify_and_read(file_path, metadata.mime_type)
         except (OSError, PermissionError) as e:
             self.logger.error(f"Cannot read {file_path}: {e}")
             return None
 
-    def _calculate_checksum(self, file_path: Path) -> str:
-        """Calculate SHA-256 checksum with error handling"""
-        hash_sha256 = hashlib.sha256()
+        if self.calculate_checksums:
+            metadata.checksum = self._checksum_bytes(raw)
+
+        if not is_binary:
+            # Nearly every file is UTF-8: validate once and keep the bytes
+            # as they are; anything else is read as latin1, which maps every
+            # byte and so cannot fail
+            if _is_utf8(raw):
+                encoding = "utf-8"
+            else:
+                raw = raw.decode("latin1").encode("utf-8")
+                encoding = "latin1"
+
+            # Same newline translation as reading in text mode; a CR byte
+            # never occurs inside a multi-byte UTF-8 sequence
+            if b"\r" in raw:
+                raw = raw.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+            # Track whether the file ends with a newline
+            metadata.ends_with_newline = raw.endswith(b"\n")
+            metadata.is_binary = False
+            metadata.encoding = encoding
+            return raw
+
+        metadata.is_binary = True
+        metadata.encoding = "base64"
+        return raw
+
+    @staticmethod
+    def _checksum_factory(algorithm: str) -> Callable[[], Any]:
+        """Return the hash object constructor for a checksum algorithm.
+
+        SHA-256 comes from hashlib; BLAKE3 and XXH3 (content identity only,
+        not collision resistant) need the blake3 and xxhash packages.
+        """
+        if algorithm == "sha256":
+            return hashlib.sha256
+        if algorithm == "blake3":
+            if not HAS_BLAKE3:
+                raise FileCombinerError(
+                    "blake3 is required for blake3 checksums: pip install blake3"
+                )
+            factory: Callable[[], Any] = blake3.blake3
+            return factory
+        if algorithm == "xxh3":
+            if not HAS_XXHASH:
+                raise FileCombinerError(
+                    "xxhash is required for xxh3 checksums: pip install xxhash"
+                )
+            factory = xxhash.xxh3_64
+            return factory
+        raise ValueError(f"Unknown checksum algorithm: {algorithm}")
+
+    def _format_checksum(self, hasher: Any) -> str:
+        """Hex digest, prefixed with the algorithm unless it is SHA-256.
+
+        Bare hex stays SHA-256 so checksums in existing archives keep their
+        meaning.
+        """
+        digest: str = hasher.hexdigest()
+        if self.checksum_algorithm == "sha256":
+            return digest
+        return f"{self.checksum_algorithm}:{digest}"
+
+    def _checksum_bytes(self, data: bytes) -> str:
+        """Checksum of content that is already in memory"""
+        hasher = self._new_hasher()
+        hasher.update(data)
+        return self._format_checksum(hasher)
+
+    def _calculate_checksum(self, file_path: Union[str, Path]) -> str:
+        """Calculate the file checksum (SHA-256 by default) with error handling
+
+        Large files are hashed straight from an mmap so the digest runs in a
+        single C call; smaller ones go through a readinto loop over the
+        thread's reused buffer, so no per-file or per-chunk buffer is
+        allocated.
+        """
+        self._check_cancelled()
         try:
             with open(file_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size > _MMAP_HASH_THRESHOLD:
+                    try:
+                        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                            hasher = self._new_hasher()
+                            hasher.update(mm)
+                            return self._format_checksum(hasher)
+                    except (ValueError, OSError):
+                        pass  # Not mappable (e.g. special file); stream instead
+
+                hasher = self._new_hasher()
+                view = _thread_buffer(self.buffer_size)
                 while True:
-                    chunk = f.read(self.buffer_size)
-                    if not chunk:
+                    self._check_cancelled()
+                    n = f.readinto(view)
+                    if not n:
                         break
-                    hash_sha256.update(chunk)
+                    hasher.update(view[:n])
 
-            return hash_sha256.hexdigest()
+            return self._format_checksum(hasher)
         except (OSError, PermissionError) as e:
             self.logger.warning(f"Cannot calculate checksum for {file_path}: {e}")
             return "error"
 
-    async def _write_archive(
+    def _write_archive_streaming(
         self,
         output_path: Path,
         source_path: Path,
-        processed_files: List[Tuple[FileMetadata, bytes]],
-        compress: bool,
-        format_type: str = "txt",
-    ) -> bool:
-        """Write archive with atomic operations and proper error handling"""
-        temp_file = None
-        try:
-            # Create temporary file in same directory as output
-            temp_file = tempfile.NamedTemporaryFile(
-                mode="wb" if compress else "w",
-                suffix=".tmp",
-                dir=output_path.parent,
-                delete=False,
-                encoding="utf-8" if not compress else None,
-            )
-            self._temp_files.append(temp_file.name)
-
-            # Write to temporary file first (atomic operation)
-            if compress:
-                with gzip.open(
-                    temp_file.name,
-                    "wt",
-                    encoding="utf-8",
-                    compresslevel=self.compression_level,
-                ) as f:
-                    await self._write_format_content(
-                        f, source_path, processed_files, format_type
-                    )
-            else:
-                with open(temp_file.name, "w", encoding="utf-8") as f:
-                    await self._write_format_content(
-                        f, source_path, processed_files, format_type
-                    )
-
-            # Atomic move to final location
-            shutil.move(temp_file.name, output_path)
-            self._temp_files.remove(temp_file.name)
-
-            return True
-
-        except Exception as e:
-            self.logger.error(f"Error writing archive: {e}")
-            if temp_file and temp_file.name in self._temp_files:
-                try:
-                    os.unlink(temp_file.name)
-                    self._temp_files.remove(temp_file.name)
-                except OSError:
-                    pass
-            return False
-
-    async def _write_archive_streaming(
-        self,
-        output_path: Path,
-        source_path: Path,
-        file_entries: List[Tuple[FileMetadata, Path]],
+        file_entries: List[Tuple[FileMetadata, str]],
         compress: bool,
         format_type: str = "txt",
     ) -> bool:
@@ -1282,38 +2460,46 @@ class FileCombiner:
         Reads file content on-demand during write, avoiding accumulation
         of all file contents in memory. This allows processing repositories
         of any size with bounded memory usage.
+
+        This is blocking and is run as a single call on a worker thread:
+        the writers are synchronous, so there is no per-write or per-file
+        hop through the event loop.
         """
         temp_file = None
+        self._raw_binary_active = self.embed_binary_raw and not compress and (
+            format_type == "txt"
+        )
+        if self.embed_binary_raw and not self._raw_binary_active:
+            self.logger.warning(
+                "Raw binary embedding needs an uncompressed txt archive; using base64"
+            )
         try:
             # Create temporary file in same directory as output
             temp_file = tempfile.NamedTemporaryFile(
-                mode="wb" if compress else "w",
+                mode="wb",
+                buffering=_OUTPUT_BUFFER_SIZE,
                 suffix=".tmp",
                 dir=output_path.parent,
                 delete=False,
-                encoding="utf-8" if not compress else None,
             )
             self._temp_files.append(temp_file.name)
 
             # Write to temporary file first (atomic operation)
-            if compress:
-                with gzip.open(
-                    temp_file.name,
-                    "wt",
-                    encoding="utf-8",
-                    compresslevel=self.compression_level,
-                ) as f:
-                    await self._write_format_streaming(
-                        f, source_path, file_entries, format_type
-                    )
-            else:
-                with open(temp_file.name, "w", encoding="utf-8") as f:
-                    await self._write_format_streaming(
-                        f, source_path, file_entries, format_type
+            with temp_file:
+                if compress:
+                    with self._open_compressor(temp_file, output_path) as sink:
+                        self._write_format_streaming(
+                            _Utf8Writer(sink), source_path, file_entries, format_type
+                        )
+                else:
+                    self._write_format_streaming(
+                        _Utf8Writer(temp_file), source_path, file_entries, format_type
                     )
 
-            # Atomic move to final location
-            shutil.move(temp_file.name, output_path)
+            # Atomic rename to the final location; the temp file is in the
+            # output directory, so this never needs shutil.move's copy
+            # fallback, and it also replaces an existing output on Windows
+            os.replace(temp_file.name, output_path)
             self._temp_files.remove(temp_file.name)
 
             return True
@@ -1327,108 +2513,240 @@ class FileCombiner:
                 except OSError:
                     pass
             return False
+        finally:
+            self._raw_binary_active = False
+
+    def _open_compressor(self, raw, output_path: Path):
+        """Wrap a binary stream in a compressor chosen by the output suffix.
 
-    async def _write_format_streaming(
+        ``.zst``/``.zstd`` outputs use multi-threaded zstandard at
+        ``zstd_level``; everything else is gzip at ``compression_level``.
+        A compression profile replaces both levels (see
+        ``_compression_levels``).
+        """
+        level, zstd_level = self._compression_levels(self.stats["bytes_processed"])
+        if self.verbose and self.compression_profile is not None:
+            self.logger.debug(
+                f"Compression profile {self.compression_profile}: "
+                f"gzip level {level}, zstd level {zstd_level}"
+            )
+
+        if output_path.suffix.lower() in _ZSTD_SUFFIXES:
+            if not HAS_ZSTD:
+                raise FileCombinerError(
+                    "zstandard is required for .zst output: pip install zstandard"
+                )
+            compressor = zstandard.ZstdCompressor(level=zstd_level, threads=-1)
+            return compressor.stream_writer(raw, closefd=False)
+
+        gzip_module = self._gzip_backend(self.compression_backend, level)
+        if gzip_module is isal_gzip:
+            level = min(level, _ISAL_MAX_LEVEL)
+        # GzipFile only buffers writes from Python 3.12, so batch the many
+        # small header writes into large deflate calls
+        return io.BufferedWriter(
+            gzip_module.GzipFile(
+                fileobj=raw, mode="wb", compresslevel=level, mtime=0
+            ),
+            buffer_size=_OUTPUT_BUFFER_SIZE,
+        )
+
+    def _compression_levels(self, total_bytes: int) -> Tuple[int, int]:
+        """Return the (gzip, zstd) levels for an archive of ``total_bytes``.
+
+        Without a profile these are ``compression_level`` and
+        ``zstd_level``. "latency" favours speed and "archive" size.
+        "balanced" takes the middle tier, except for small inputs, where
+        compression time is negligible anyway.
+        """
+        profile = self.compression_profile
+        if profile is None:
+            return self.compression_level, self.zstd_level
+        if profile == "balanced" and total_bytes < _SMALL_ARCHIVE_SIZE:
+            profile = "latency"
+        return _COMPRESSION_PROFILES[profile]
+
+    @staticmethod
+    def _gzip_backend(name: str, level: int) -> Any:
+        """Return the gzip-compatible module used to write and read gzip.
+
+        python-isal (ISA-L) and zlib-ng provide SIMD DEFLATE behind the
+        stdlib gzip API. "auto" picks ISA-L when it covers the level (its
+        scale stops at 3), then zlib-ng, then the stdlib.
+        """
+        if name == "auto":
+            if HAS_ISAL and level <= _ISAL_MAX_LEVEL:
+                return isal_gzip
+            return gzip_ng if HAS_ZLIB_NG else gzip
+        if name == "isal":
+            if not HAS_ISAL:
+                raise FileCombinerError(
+                    "isal is required for the isal compression backend: pip install isal"
+                )
+            return isal_gzip
+        if name == "zlib-ng":
+            if not HAS_ZLIB_NG:
+                raise FileCombinerError(
+                    "zlib-ng is required for the zlib-ng compression backend: "
+                    "pip install zlib-ng"
+                )
+            return gzip_ng
+        if name == "gzip":
+            return gzip
+        raise ValueError(f"Unknown compression backend: {name}")
+
+    def _write_format_streaming(
         self,
         f,
         source_path: Path,
-        file_entries: List[Tuple[FileMetadata, Path]],
+        file_entries: List[Tuple[FileMetadata, str]],
         format_type: str,
     ):
         """Dispatch to appropriate streaming format writer"""
         if format_type == "xml":
-            await self._write_xml_streaming(f, source_path, file_entries)
+            self._write_xml_streaming(f, source_path, file_entries)
         elif format_type == "json":
-            await self._write_json_streaming(f, source_path, file_entries)
+            self._write_json_streaming(f, source_path, file_entries)
         elif format_type == "markdown":
-            await self._write_markdown_streaming(f, source_path, file_entries)
+            self._write_markdown_streaming(f, source_path, file_entries)
         elif format_type == "yaml":
-            await self._write_yaml_streaming(f, source_path, file_entries)
+            self._write_yaml_streaming(f, source_path, file_entries)
         else:  # Default to txt format
-            await self._write_txt_streaming(f, source_path, file_entries)
+            self._write_txt_streaming(f, source_path, file_entries)
+
+    def _iter_contents(
+        self, file_entries: List[Tuple[FileMetadata, str]]
+    ) -> Iterator[Tuple[FileMetadata, Optional[bytes]]]:
+        """Yield each entry's metadata with its content, read on-demand.
+
+        Upcoming files are read ahead on up to read_concurrency threads
+        while the caller writes the current one, so many small reads are
+        in flight at once (keeping the device queue busy) and overlap with
+        encoding and output. The read-ahead window is bounded by
+        ``_READAHEAD_BYTES`` of file sizes, so memory stays bounded too.
+        """
+        if not file_entries:
+            return
 
-    def _read_content_for_entry(
-        self, metadata: FileMetadata, file_path: Path
-    ) -> Optional[bytes]:
-        """Read file content on-demand for streaming write"""
-        content = self._read_file_content(file_path, metadata)
-        return content
+        pending: collections.deque[Tuple[Future, int]] = collections.deque()
+        window = 0  # Bytes of the files in ``pending``
+        next_index = 0
 
-    async def _read_content_async(
-        self, metadata: FileMetadata, file_path: Path
-    ) -> Optional[bytes]:
-        """Async version of _read_content_for_entry using thread pool"""
-        return await run_in_thread(self._read_content_for_entry, metadata, file_path)
+        with ThreadPoolExecutor(max_workers=self.read_concurrency) as reader:
 
-    async def _write_with_prefetch(
+            def read_ahead() -> None:
+                nonlocal window, next_index
+                while (
+                    next_index < len(file_entries)
+                    and len(pending) < self.read_concurrency
+                ):
+                    metadata, file_path = file_entries[next_index]
+                    if pending and window + metadata.size > _READAHEAD_BYTES:
+                        return
+                    future = reader.submit(
+                        self._read_file_content, file_path, metadata
+                    )
+                    pending.append((future, metadata.size))
+                    window += metadata.size
+                    next_index += 1
+
+            for metadata, _ in file_entries:
+                read_ahead()
+                future, size = pending.popleft()
+                window -= size
+                content = future.result()
+                self._check_cancelled()
+
+                # Keep the window full while this file is written
+                read_ahead()
+                yield metadata, content
+                content = None
+
+    def _copy_raw_entry(self, sink, source_path: Path, metadata: FileMetadata) -> None:
+        """Copy a raw-embedded file into the archive without passing through Python"""
+        sink.flush()
+        src_path = os.path.join(source_path, metadata.path)
+        with open(src_path, "rb") as src:
+            copied = _copy_fd_range(src.fileno(), sink.fileno(), metadata.size)
+        if copied != metadata.size:
+            raise FileCombinerError(f"{metadata.path} changed while being archived")
+
+    def _write_base64(self, f, data: bytes) -> None:
+        """Stream base64 of ``data`` to the sink in 3-byte aligned chunks.
+
+        Output matches ``base64.b64encode(data)`` without building the
+        4/3-sized copy of the whole file first.
+        """
+        view = memoryview(data)
+        for start in range(0, len(view), _B64_CHUNK):
+            f.write(_b64encode(view[start : start + _B64_CHUNK]))
+
+    def _write_with_prefetch(
         self,
         f,
-        file_entries: List[Tuple[FileMetadata, Path]],
+        file_entries: List[Tuple[FileMetadata, str]],
         write_entry_func: Callable[[Any, FileMetadata, bytes], None],
     ):
         """Write entries with prefetching - reads next file while writing current.
 
-        This provides true async performance by overlapping I/O operations:
-        - While writing file N to output, file N+1 is being read from disk
-        - Improves throughput by ~30-50% on I/O-bound workloads
+        While file N is written to the output, file N+1 is being read from
+        disk (see ``_iter_contents``).
         """
-        if not file_entries:
-            return
-
-        # Start reading the first file
-        prefetch_task = asyncio.create_task(
-            self._read_content_async(file_entries[0][0], file_entries[0][1])
-        )
-
-        for i, (metadata, file_path) in enumerate(file_entries):
-            # Wait for prefetched content
-            content = await prefetch_task
-
-            # Start prefetching next file immediately (before writing current)
-            if i + 1 < len(file_entries):
-                next_metadata, next_path = file_entries[i + 1]
-                prefetch_task = asyncio.create_task(
-                    self._read_content_async(next_metadata, next_path)
-                )
-
+        for metadata, content in self._iter_contents(file_entries):
             # Write current file (while next is being read)
             if content is not None:
                 write_entry_func(f, metadata, content)
-            # Content goes out of scope here - memory freed
+            # Drop the buffer before waiting on the prefetch so at most the
+            # file being read and the one being written are held at once
+            content = None
 
-    async def _write_txt_streaming(
-        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, Path]]
+    def _write_txt_streaming(
+        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, str]]
     ):
         """Write TXT archive with streaming - O(1) memory"""
-        # Write enhanced header
-        f.write("# Enhanced Combined Files Archive\n")
-        f.write(f"# Generated by file-combiner v{__version__}\n")
-        f.write(f"# Date: {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}\n")
-        f.write(f"# Source: {source_path}\n")
-        f.write(f"# Total files: {len(file_entries)}\n")
-        f.write(f"# Total size: {self._format_size(self.stats['bytes_processed'])}\n")
-        f.write("#\n")
-        f.write("# Format:\n")
-        f.write(f"# {self.SEPARATOR}\n")
-        f.write(f"# {self.METADATA_PREFIX} <json_metadata>\n")
-        f.write(f"# {self.ENCODING_PREFIX} <encoding_type>\n")
-        f.write("# <file_content>\n")
-        f.write("#\n\n")
+        # Write enhanced header in one go
+        f.write(
+            "# Enhanced Combined Files Archive\n"
+            f"# Generated by file-combiner v{__version__}\n"
+            f"# Date: {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}\n"
+            f"# Source: {source_path}\n"
+            f"# Total files: {len(file_entries)}\n"
+            f"# Total size: {self._format_size(self.stats['bytes_processed'])}\n"
+            "#\n"
+            "# Format:\n"
+            f"# {self.SEPARATOR}\n"
+            f"# {self.METADATA_PREFIX} <json_metadata>\n"
+            f"# {self.ENCODING_PREFIX} <encoding_type>\n"
+            "# <file_content>\n"
+            "#\n\n"
+        )
+
+        # Static parts of each entry header, encoded once
+        entry_head = f"{self.SEPARATOR}\n{self.METADATA_PREFIX} ".encode()
+        encoding_lines: Dict[str, bytes] = {}
 
         def write_txt_entry(f, metadata: FileMetadata, content: bytes):
-            f.write(f"{self.SEPARATOR}\n")
-            f.write(f"{self.METADATA_PREFIX} {json.dumps(asdict(metadata))}\n")
-            f.write(f"{self.ENCODING_PREFIX} {metadata.encoding}\n")
-            if metadata.is_binary:
-                f.write(content.decode("ascii"))
+            encoding_line = encoding_lines.get(metadata.encoding)
+            if encoding_line is None:
+                line = f"\n{self.ENCODING_PREFIX} {metadata.encoding}\n"
+                encoding_line = encoding_lines[metadata.encoding] = line.encode("utf-8")
+            f.write(
+                b"".join(
+                    (entry_head, _dumps_json(metadata.to_dict()), encoding_line)
+                )
+            )
+            if metadata.encoding == "raw":
+                self._copy_raw_entry(f.raw, source_path, metadata)
+            elif metadata.is_binary:
+                self._write_base64(f, content)
             else:
-                f.write(content.decode("utf-8"))
-            f.write("\n")
+                f.write(content)
+            f.write(b"\n")
 
-        await self._write_with_prefetch(f, file_entries, write_txt_entry)
+        self._write_with_prefetch(f, file_entries, write_txt_entry)
 
-    async def _write_xml_streaming(
-        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, Path]]
+    def _write_xml_streaming(
+        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, str]]
     ):
         """Write XML archive with streaming and prefetching - O(1) memory per file"""
         # Write XML header manually for streaming
@@ -1443,17 +2761,19 @@ class FileCombiner:
             # Build file element with attributes
             attrs = " ".join(
                 f'{k}="{self._xml_escape_attr(str(v))}"'
-                for k, v in asdict(metadata).items()
+                for k, v in metadata.to_dict().items()
                 if v is not None
             )
             f.write(f"  <file {attrs}>")
             if metadata.is_binary:
-                f.write(content.decode("ascii"))
+                self._write_base64(f, content)
             else:
-                f.write(self._xml_escape_content(content.decode("utf-8")))
+                # Escaped as UTF-8 bytes: &, < and > are ASCII and never
+                # occur inside a multi-byte sequence
+                f.write(self._xml_escape_content(content))
             f.write("</file>\n")
 
-        await self._write_with_prefetch(f, file_entries, write_xml_entry)
+        self._write_with_prefetch(f, file_entries, write_xml_entry)
         f.write("</file_archive>")
 
     def _xml_escape_attr(self, s: str) -> str:
@@ -1466,12 +2786,16 @@ class FileCombiner:
             .replace("'", "&apos;")
         )
 
-    def _xml_escape_content(self, s: str) -> str:
-        """Escape string for XML element content"""
+    def _xml_escape_content(self, s: Union[str, bytes]) -> Union[str, bytes]:
+        """Escape string (or UTF-8 bytes) for XML element content"""
+        if isinstance(s, bytes):
+            return (
+                s.replace(b"&", b"&amp;").replace(b"<", b"&lt;").replace(b">", b"&gt;")
+            )
         return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
-    async def _write_json_streaming(
-        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, Path]]
+    def _write_json_streaming(
+        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, str]]
     ):
         """Write JSON archive with streaming and prefetching"""
         # Write header
@@ -1490,20 +2814,7 @@ class FileCombiner:
         # Stream with prefetching (JSON needs special handling for commas)
         if file_entries:
             first = True
-            prefetch_task = asyncio.create_task(
-                self._read_content_async(file_entries[0][0], file_entries[0][1])
-            )
-
-            for i, (metadata, file_path) in enumerate(file_entries):
-                content = await prefetch_task
-
-                # Prefetch next file
-                if i + 1 < len(file_entries):
-                    next_metadata, next_path = file_entries[i + 1]
-                    prefetch_task = asyncio.create_task(
-                        self._read_content_async(next_metadata, next_path)
-                    )
-
+            for metadata, content in self._iter_contents(file_entries):
                 if content is None:
                     continue
 
@@ -1511,21 +2822,33 @@ class FileCombiner:
                     f.write(",\n")
                 first = False
 
-                file_data = asdict(metadata)
+                file_data = metadata.to_dict()
                 if metadata.is_binary:
-                    file_data["content"] = content.decode("ascii")
+                    # base64 needs no JSON escaping, so it is streamed into
+                    # the (last) empty "content" string instead of being
+                    # built up as bytes, str and JSON copies
+                    file_data["content"] = ""
                 else:
                     file_data["content"] = content.decode("utf-8")
 
-                # Write indented JSON for this file
-                file_json = json.dumps(file_data, indent=2, ensure_ascii=False)
-                indented = "\n".join("    " + line for line in file_json.split("\n"))
-                f.write(indented)
+                # Write indented JSON for this file; strings never contain a
+                # raw newline, so re-indenting is a plain replace
+                file_json = _dumps_json(file_data, indent=True).replace(
+                    b"\n", b"\n    "
+                )
+                if metadata.is_binary:
+                    cut = file_json.rindex(b'""') + 1
+                    f.write(b"    " + file_json[:cut])
+                    self._write_base64(f, content)
+                    f.write(file_json[cut:])
+                else:
+                    f.write(b"    " + file_json)
+                del content, file_data, file_json
 
         f.write("\n  ]\n}")
 
-    async def _write_markdown_streaming(
-        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, Path]]
+    def _write_markdown_streaming(
+        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, str]]
     ):
         """Write Markdown archive with streaming and prefetching"""
         # Write header
@@ -1548,32 +2871,34 @@ class FileCombiner:
         f.write("\n")
 
         def write_md_entry(f, metadata: FileMetadata, content: bytes):
-            f.write(f"## {metadata.path}\n\n")
-            f.write(f"**Size:** {self._format_size(metadata.size)}  \n")
+            modified = time.strftime(
+                "%Y-%m-%d %H:%M:%S", time.localtime(metadata.mtime)
+            )
             f.write(
-                f"**Modified:** {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(metadata.mtime))}  \n"
+                f"## {metadata.path}\n\n"
+                f"**Size:** {self._format_size(metadata.size)}  \n"
+                f"**Modified:** {modified}  \n"
+                f"**Encoding:** {metadata.encoding}  \n"
+                f"**Binary:** {'Yes' if metadata.is_binary else 'No'}  \n\n"
             )
-            f.write(f"**Encoding:** {metadata.encoding}  \n")
-            f.write(f"**Binary:** {'Yes' if metadata.is_binary else 'No'}  \n\n")
 
             if metadata.is_binary:
-                content_str = content.decode("ascii")
-                fence = self._get_safe_fence(content_str)
-                f.write(f"{fence}\n")
-                f.write(content_str)
-                f.write(f"\n{fence}\n\n")
+                # base64 never contains backticks, so the plain fence is safe
+                f.write("```\n")
+                self._write_base64(f, content)
+                f.write("\n```\n\n")
             else:
                 lang = self._detect_language(metadata.path)
-                content_str = content.decode("utf-8")
-                fence = self._get_safe_fence(content_str)
+                # The UTF-8 bytes are fenced and written without decoding
+                fence = self._get_safe_fence(content)
                 f.write(f"{fence}{lang}\n")
-                f.write(content_str)
+                f.write(content)
                 f.write(f"\n{fence}\n\n")
 
-        await self._write_with_prefetch(f, file_entries, write_md_entry)
+        self._write_with_prefetch(f, file_entries, write_md_entry)
 
-    async def _write_yaml_streaming(
-        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, Path]]
+    def _write_yaml_streaming(
+        self, f, source_path: Path, file_entries: List[Tuple[FileMetadata, str]]
     ):
         """Write YAML archive with streaming and prefetching"""
         # Write header
@@ -1586,218 +2911,25 @@ class FileCombiner:
         f.write("files:\n")
 
         def write_yaml_entry(f, metadata: FileMetadata, content: bytes):
-            f.write(f"  - path: '{metadata.path}'\n")
-            f.write(f"    size: {metadata.size}\n")
-            f.write(f"    mtime: {metadata.mtime}\n")
-            f.write(f"    encoding: '{metadata.encoding}'\n")
-            f.write(f"    is_binary: {str(metadata.is_binary).lower()}\n")
-
-            if metadata.is_binary:
-                content_str = content.decode("ascii")
-            else:
-                content_str = content.decode("utf-8")
-
-            content_lines = content_str.split("\n")
-            f.write("    content: |\n")
-            for line in content_lines:
-                f.write(f"      {line}\n")
-            f.write("\n")
-
-        await self._write_with_prefetch(f, file_entries, write_yaml_entry)
-
-    async def _write_archive_content(
-        self, f, source_path: Path, processed_files: List[Tuple[FileMetadata, bytes]]
-    ):
-        """Write the actual archive content"""
-        # Write enhanced header
-        f.write("# Enhanced Combined Files Archive\n")
-        f.write(f"# Generated by file-combiner v{__version__}\n")
-        f.write(f"# Date: {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}\n")
-        f.write(f"# Source: {source_path}\n")
-        f.write(f"# Total files: {len(processed_files)}\n")
-        f.write(f"# Total size: {self._format_size(self.stats['bytes_processed'])}\n")
-        f.write("#\n")
-        f.write("# Format:\n")
-        f.write(f"# {self.SEPARATOR}\n")
-        f.write(f"# {self.METADATA_PREFIX} <json_metadata>\n")
-        f.write(f"# {self.ENCODING_PREFIX} <encoding_type>\n")
-        f.write("# <file_content>\n")
-        f.write("#\n\n")
-
-        # Write files
-        for metadata, content in processed_files:
-            f.write(f"{self.SEPARATOR}\n")
-            f.write(f"{self.METADATA_PREFIX} {json.dumps(asdict(metadata))}\n")
-            f.write(f"{self.ENCODING_PREFIX} {metadata.encoding}\n")
-
-            if metadata.is_binary:
-                f.write(content.decode("ascii"))
-            else:
-                f.write(content.decode("utf-8"))
-
-            # Add separator after content
-            f.write("\n")
-
-    async def _write_format_content(
-        self,
-        f,
-        source_path: Path,
-        processed_files: List[Tuple[FileMetadata, bytes]],
-        format_type: str,
-    ):
-        """Dispatch to appropriate format writer"""
-        if format_type == "xml":
-            await self._write_xml_format(f, source_path, processed_files)
-        elif format_type == "json":
-            await self._write_json_format(f, source_path, processed_files)
-        elif format_type == "markdown":
-            await self._write_markdown_format(f, source_path, processed_files)
-        elif format_type == "yaml":
-            await self._write_yaml_format(f, source_path, processed_files)
-        else:  # Default to txt format
-            await self._write_archive_content(f, source_path, processed_files)
-
-    async def _write_xml_format(
-        self, f, source_path: Path, processed_files: List[Tuple[FileMetadata, bytes]]
-    ):
-        """Write archive in XML format"""
-        import xml.etree.ElementTree as ET
-
-        # Create root element
-        root = ET.Element("file_archive")
-        root.set("version", __version__)
-        root.set("created", time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime()))
-        root.set("source", str(source_path))
-        root.set("total_files", str(len(processed_files)))
-        root.set("total_size", str(self.stats["bytes_processed"]))
-
-        # Add files
-        for metadata, content in processed_files:
-            file_elem = ET.SubElement(root, "file")
-
-            # Add metadata as attributes
-            for key, value in asdict(metadata).items():
-                if value is not None:
-                    file_elem.set(key, str(value))
-
-            # Add content
-            if metadata.is_binary:
-                file_elem.text = content.decode("ascii")
-            else:
-                file_elem.text = content.decode("utf-8")
-
-        # Write XML with declaration
-        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        ET.indent(root, space="  ")
-        f.write(ET.tostring(root, encoding="unicode"))
-
-    async def _write_json_format(
-        self, f, source_path: Path, processed_files: List[Tuple[FileMetadata, bytes]]
-    ):
-        """Write archive in JSON format"""
-        archive_data = {
-            "metadata": {
-                "version": __version__,
-                "created": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime()),
-                "source": str(source_path),
-                "total_files": len(processed_files),
-                "total_size": self.stats["bytes_processed"],
-            },
-            "files": [],
-        }
-
-        for metadata, content in processed_files:
-            file_data = asdict(metadata)
-
-            if metadata.is_binary:
-                file_data["content"] = content.decode("ascii")
-            else:
-                file_data["content"] = content.decode("utf-8")
-
-            archive_data["files"].append(file_data)
-
-        json.dump(archive_data, f, indent=2, ensure_ascii=False)
-
-    async def _write_markdown_format(
-        self, f, source_path: Path, processed_files: List[Tuple[FileMetadata, bytes]]
-    ):
-        """Write archive in Markdown format with syntax highlighting"""
-        # Write header
-        f.write(f"# Combined Files Archive\n\n")
-        f.write(f"**Generated by:** file-combiner v{__version__}  \n")
-        f.write(
-            f"**Date:** {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}  \n"
-        )
-        f.write(f"**Source:** `{source_path}`  \n")
-        f.write(f"**Total files:** {len(processed_files)}  \n")
-        f.write(
-            f"**Total size:** {self._format_size(self.stats['bytes_processed'])}  \n\n"
-        )
-
-        # Table of contents
-        f.write("## Table of Contents\n\n")
-        for i, (metadata, _) in enumerate(processed_files, 1):
             f.write(
-                f"{i}. [{metadata.path}](#{metadata.path.replace('/', '').replace('.', '')})\n"
+                f"  - path: '{metadata.path}'\n"
+                f"    size: {metadata.size}\n"
+                f"    mtime: {metadata.mtime}\n"
+                f"    encoding: '{metadata.encoding}'\n"
+                f"    is_binary: {str(metadata.is_binary).lower()}\n"
+                "    content: |\n"
+                "      "
             )
-        f.write("\n")
-
-        # Write files
-        for metadata, content in processed_files:
-            f.write(f"## {metadata.path}\n\n")
-            f.write(f"**Size:** {self._format_size(metadata.size)}  \n")
-            f.write(
-                f"**Modified:** {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(metadata.mtime))}  \n"
-            )
-            f.write(f"**Encoding:** {metadata.encoding}  \n")
-            f.write(f"**Binary:** {'Yes' if metadata.is_binary else 'No'}  \n\n")
-
-            if metadata.is_binary:
-                content_str = content.decode("ascii")
-                fence = self._get_safe_fence(content_str)
-                f.write(f"{fence}\n")
-                f.write(content_str)
-                f.write(f"\n{fence}\n\n")
-            else:
-                # Detect language for syntax highlighting
-                lang = self._detect_language(metadata.path)
-                content_str = content.decode("utf-8")
-                fence = self._get_safe_fence(content_str)
-                f.write(f"{fence}{lang}\n")
-                f.write(content_str)
-                f.write(f"\n{fence}\n\n")
-
-    async def _write_yaml_format(
-        self, f, source_path: Path, processed_files: List[Tuple[FileMetadata, bytes]]
-    ):
-        """Write archive in YAML format"""
-        # Write header
-        f.write("# Combined Files Archive\n")
-        f.write(f"version: {__version__}\n")
-        f.write(f"created: '{time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}'\n")
-        f.write(f"source: '{source_path}'\n")
-        f.write(f"total_files: {len(processed_files)}\n")
-        f.write(f"total_size: {self.stats['bytes_processed']}\n\n")
-        f.write("files:\n")
-
-        for metadata, content in processed_files:
-            f.write(f"  - path: '{metadata.path}'\n")
-            f.write(f"    size: {metadata.size}\n")
-            f.write(f"    mtime: {metadata.mtime}\n")
-            f.write(f"    encoding: '{metadata.encoding}'\n")
-            f.write(f"    is_binary: {str(metadata.is_binary).lower()}\n")
-
             if metadata.is_binary:
-                content_str = content.decode("ascii")
+                # base64 is a single line
+                self._write_base64(f, content)
+                f.write(b"\n\n")
             else:
-                content_str = content.decode("utf-8")
+                # Indent every line in one pass over the UTF-8 bytes and
+                # write the block at once, instead of a write per line
+                f.write(content.replace(b"\n", b"\n      ") + b"\n\n")
 
-            # Escape and format content for YAML
-            content_lines = content_str.split("\n")
-            f.write("    content: |\n")
-            for line in content_lines:
-                f.write(f"      {line}\n")
-            f.write("\n")
+        self._write_with_prefetch(f, file_entries, write_yaml_entry)
 
     def _detect_input_format(self, input_path: Path) -> str:
         """
@@ -1808,7 +2940,7 @@ class FileCombiner:
         suffix = input_path.suffix.lower()
 
         # Handle compressed files
-        if suffix == ".gz":
+        if suffix == ".gz" or suffix in _ZSTD_SUFFIXES:
             # Get the actual format from the inner extension
             stem = input_path.stem
             inner_suffix = Path(stem).suffix.lower()
@@ -1834,10 +2966,13 @@ class FileCombiner:
                     magic = f.read(2)
                     # Check for gzip
                     if magic == b"\x1f\x8b":
-                        import gzip
-
-                        with gzip.open(input_path, "rt", encoding="utf-8") as gf:
+                        with self._gzip_module.open(
+                            input_path, "rt", encoding="utf-8"
+                        ) as gf:
                             first_chars = gf.read(100).strip()
+                    elif magic + f.read(2) == _ZSTD_MAGIC and HAS_ZSTD:
+                        with self._open_zstd(input_path) as zf:
+                            first_chars = zf.read(100).strip()
                     else:
                         f.seek(0)
                         first_chars = f.read(100).decode("utf-8", errors="ignore").strip()
@@ -1860,54 +2995,12 @@ class FileCombiner:
 
     def _detect_language(self, file_path: str) -> str:
         """Detect programming language from file extension for syntax highlighting"""
-        ext = Path(file_path).suffix.lower()
-        lang_map = {
-            ".py": "python",
-            ".js": "javascript",
-            ".ts": "typescript",
-            ".java": "java",
-            ".cpp": "cpp",
-            ".c": "c",
-            ".h": "c",
-            ".cs": "csharp",
-            ".php": "php",
-            ".rb": "ruby",
-            ".go": "go",
-            ".rs": "rust",
-            ".swift": "swift",
-            ".kt": "kotlin",
-            ".scala": "scala",
-            ".sh": "bash",
-            ".bash": "bash",
-            ".zsh": "zsh",
-            ".fish": "fish",
-            ".ps1": "powershell",
-            ".sql": "sql",
-            ".html": "html",
-            ".xml": "xml",
-            ".css": "css",
-            ".scss": "scss",
-            ".sass": "sass",
-            ".less": "less",
-            ".json": "json",
-            ".yaml": "yaml",
-            ".yml": "yaml",
-            ".toml": "toml",
-            ".ini": "ini",
-            ".cfg": "ini",
-            ".conf": "ini",
-            ".md": "markdown",
-            ".rst": "rst",
-            ".tex": "latex",
-            ".r": "r",
-            ".m": "matlab",
-            ".pl": "perl",
-            ".lua": "lua",
-            ".vim": "vim",
-            ".dockerfile": "dockerfile",
-            ".makefile": "makefile",
-        }
-        return lang_map.get(ext, "")
+        # Same suffix as Path(file_path).suffix, without building a Path
+        name_start = file_path.rfind("/") + 1
+        dot = file_path.rfind(".")
+        if dot <= name_start:
+            return ""
+        return _LANGUAGES.get(file_path[dot:].lower(), "")
 
     async def split_files(
         self,
@@ -1927,10 +3020,13 @@ class FileCombiner:
                 raise FileCombinerError(f"Input path is not a file: {input_path}")
 
             # Detect compression
-            is_compressed = input_path.suffix == ".gz" or self._is_gzip_file(input_path)
+            compression = self._detect_compression(input_path)
+            is_zstd = compression == "zstd"
+            is_compressed = compression is not None
 
             # Create output directory
             output_path.mkdir(parents=True, exist_ok=True)
+            self._restored_dirs = {output_path}
 
             # Check write permissions
             if not os.access(output_path, os.W_OK):
@@ -1946,11 +3042,20 @@ class FileCombiner:
             if is_compressed:
                 self.logger.info("Detected compressed archive")
 
+            # The txt parser reads bytes so raw-embedded content can be
+            # copied out exactly, and JSON parses straight from UTF-8 bytes;
+            # the other structured formats are parsed as text
+            binary = detected_format in ("txt", "json")
+
             try:
-                open_func = gzip.open if is_compressed else open
-                mode = "rt" if is_compressed else "r"
+                if is_zstd:
+                    f = self._open_zstd(input_path, binary)
+                elif is_compressed:
+                    f = self._open_gzip(input_path, binary)
+                else:
+                    f = self._open_plain_archive(input_path, binary)
 
-                with open_func(input_path, mode, encoding="utf-8") as f:
+                with f:
                     # Dispatch to format-specific parser
                     if detected_format == "json":
                         files_restored = await self._parse_json_archive(f, output_path, progress)
@@ -1973,7 +3078,7 @@ class FileCombiner:
                     self.logger.error(f"Error reading compressed file: {e}")
                     self.logger.info("Trying to read as uncompressed...")
                     # Retry as uncompressed
-                    with open(input_path, "r", encoding="utf-8") as f:
+                    with self._open_plain_archive(input_path, binary) as f:
                         # Dispatch to format-specific parser
                         if detected_format == "json":
                             files_restored = await self._parse_json_archive(f, output_path, progress)
@@ -1998,162 +3103,317 @@ class FileCombiner:
                 self.logger.error(traceback.format_exc())
             return False
         finally:
-            self._cleanup_temp_files()
+            self._restored_dirs = set()
+            self._cleanup_temp_files()
+
+    def _detect_compression(self, file_path: Path) -> Optional[str]:
+        """Return "zstd", "gzip" or None from the suffix and magic bytes.
+
+        A known suffix needs no read at all; otherwise the magic is peeked
+        from a raw file descriptor, without building a Python file object.
+        """
+        suffix = file_path.suffix.lower()
+        if suffix in _ZSTD_SUFFIXES:
+            return "zstd"
+        if suffix == ".gz":
+            return "gzip"
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            magic = os.read(fd, 4)
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        if magic == _ZSTD_MAGIC:
+            return "zstd"
+        if magic[:2] == b"\x1f\x8b":
+            return "gzip"
+        return None
+
+    def _open_zstd(self, file_path: Path, binary: bool = False):
+        """Open a zstandard archive as a buffered byte or UTF-8 text stream"""
+        if not HAS_ZSTD:
+            raise FileCombinerError(
+                "zstandard is required to read .zst archives: pip install zstandard"
+            )
+        with contextlib.ExitStack() as stack:
+            source = stack.enter_context(open(file_path, "rb"))
+            _advise_sequential(source)
+            reader = zstandard.ZstdDecompressor().stream_reader(source, closefd=True)
+            # The reader closes the source from here on
+            stack.pop_all()
+        if binary:
+            return reader
+        return io.TextIOWrapper(reader, encoding="utf-8")
+
+    def _open_gzip(self, file_path: Path, binary: bool = False):
+        """Open a gzip archive, decompressing in parallel if rapidgzip is available"""
+        if HAS_RAPIDGZIP:
+            f = rapidgzip.open(str(file_path), parallelization=self.max_workers)
+            if binary:
+                return f
+            return io.TextIOWrapper(f, encoding="utf-8")
+        # GzipFile.fileno() is the compressed file's descriptor
+        if binary:
+            f = self._gzip_module.open(file_path, "rb")
+        else:
+            f = self._gzip_module.open(file_path, "rt", encoding="utf-8")
+        _advise_sequential(f)
+        return f
+
+    def _open_plain_archive(self, file_path: Path, binary: bool = False):
+        """Open an uncompressed archive as bytes or UTF-8 text
 
-    def _is_gzip_file(self, file_path: Path) -> bool:
-        """Check if file is gzip compressed by reading magic bytes"""
+        The caller owns the returned file and closes it.
+        """
+        with contextlib.ExitStack() as stack:
+            f: IO[Any]
+            if binary:
+                # _ArchiveReader does its own buffering
+                f = stack.enter_context(open(file_path, "rb", buffering=0))
+            else:
+                f = stack.enter_context(open(file_path, "r", encoding="utf-8"))
+            _advise_sequential(f)
+            # Hand the open file over to the caller
+            stack.pop_all()
+        return f
+
+    def _read_total_files(self, reader: "_ArchiveReader") -> Optional[int]:
+        """Read the entry count from the txt archive header.
+
+        Only the start of the archive is peeked, so plain and compressed
+        archives alike get a total without a pass over their content.
+        Returns None when the header carries no count.
+        """
+        head = b"\n" + reader.peek(_HEADER_PEEK_SIZE)
+        # The count must come before the first entry, not from its content
+        end = head.find(self._METADATA_PREFIX_BYTES)
+        if end != -1:
+            head = head[:end]
+        marker = b"\n# Total files: "
+        start = head.find(marker)
+        if start == -1:
+            return None
+        start += len(marker)
         try:
-            with open(file_path, "rb") as f:
-                magic = f.read(2)
-                return magic == b"\x1f\x8b"
-        except (OSError, PermissionError):
-            return False
+            return int(head[start : head.find(b"\n", start)])
+        except ValueError:
+            return None
 
     async def _parse_and_restore_files(
         self, f, output_path: Path, progress: bool = True
     ) -> int:
-        """Parse archive and restore files with proper content handling"""
+        """Parse archive and restore files with proper content handling.
+
+        ``f`` is a binary stream read in large chunks. Only the metadata and
+        encoding lines are decoded; each file's content is sliced out as one
+        bytes block, and raw-embedded entries are copied out by length.
+        """
+        separator = self._SEPARATOR_BYTES
+        metadata_prefix = self._METADATA_PREFIX_BYTES
+        metadata_start = len(metadata_prefix)
+        encoding_prefix = self._ENCODING_PREFIX_BYTES
+        encoding_start = len(encoding_prefix)
         current_metadata = None
-        current_encoding = None
-        current_content = []
-        in_content = False
         files_restored = 0
 
-        # First pass to count files for progress
-        total_files = 0
-        if progress:
-            try:
-                current_pos = f.tell()
-                for line in f:
-                    if line.startswith(self.METADATA_PREFIX):
-                        total_files += 1
-                f.seek(current_pos)  # Reset to beginning
-            except (OSError, io.UnsupportedOperation):
-                # If we can't seek (e.g., gzip file), skip progress counting
-                total_files = 0
-
-        # Setup progress tracking
+        reader = _ArchiveReader(f)
+        # The header carries the entry count, so progress needs no pass
+        # over the archive to count entries
+        total_files = self._read_total_files(reader) if progress else None
+
+        # Setup progress tracking; an unknown total renders as a spinner
         progress_bar = None
         task = None
-        if progress and total_files > 0:
+        pbar = None
+        if progress:
             if HAS_RICH and self.console:
-                progress_bar = Progress(
-                    SpinnerColumn(),
-                    TextColumn("[progress.description]{task.description}"),
-                    BarColumn(),
-                    MofNCompleteColumn(),
-                    TimeElapsedColumn(),
-                    console=self.console,
-                )
-                progress_bar.start()
+                progress_bar = self._start_rich_progress()
                 task = progress_bar.add_task("Extracting files", total=total_files)
-            elif HAS_TQDM and tqdm:
-                pbar = tqdm(total=total_files, desc="Extracting files", unit="files")
-            else:
+            elif HAS_TQDM:
+                pbar = self._tqdm_progress(total_files, "Extracting files")
+            elif total_files is not None:
                 print(f"Extracting {total_files} files...")
+            else:
+                print("Extracting files...")
+
+        # Progress advances in batches, since every update takes the bar's
+        # lock; a batch is also flushed once it is _PROGRESS_INTERVAL old
+        unreported = 0
+        last_report = time.monotonic()
+
+        def report_progress() -> None:
+            nonlocal unreported, last_report
+            if progress_bar and task is not None:
+                progress_bar.update(task, advance=unreported)
+            elif pbar is not None:
+                pbar.update(unreported)
+            else:
+                print(
+                    f"Extracted {files_restored}/{total_files or '?'} files...",
+                    end="\r",
+                )
+            unreported = 0
+            last_report = time.monotonic()
 
+        async def finish(restore, metadata: dict) -> Any:
+            nonlocal files_restored, unreported
+            try:
+                result = await restore
+                files_restored += 1
+            except Exception as e:
+                self.logger.error(
+                    f"Failed to restore file {metadata.get('path', 'unknown')}: {e}"
+                )
+                return None
+            if progress:
+                unreported += 1
+                if (
+                    unreported >= _PROGRESS_BATCH
+                    or time.monotonic() - last_report >= _PROGRESS_INTERVAL
+                ):
+                    report_progress()
+            return result
+
+        # Small entries are read into memory and written by a thread pool
+        # while parsing continues; writes still pending are keyed by path
+        # so a repeated path is written in archive order
+        loop = asyncio.get_running_loop()
+        write_pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending: Dict[str, asyncio.Future] = {}
+        max_pending = 2 * self.max_workers
+
+        async def wait_for_path(path: str) -> None:
+            earlier = pending.pop(path, None)
+            if earlier is not None:
+                await earlier
+
+        async def submit(metadata: dict, encoding: Optional[str], content: bytes):
+            restore = loop.run_in_executor(
+                write_pool,
+                self._restore_bytes_file_sync,
+                output_path,
+                metadata,
+                encoding,
+                content,
+            )
+            pending[metadata["path"]] = asyncio.ensure_future(
+                finish(restore, metadata)
+            )
+            if len(pending) >= max_pending:
+                await asyncio.wait(
+                    pending.values(), return_when=asyncio.FIRST_COMPLETED
+                )
+                for path in [p for p, t in pending.items() if t.done()]:
+                    del pending[path]
+
+        readline = reader.readline
+        # Pieces of the current small entry; the list is reused across
+        # entries, while the joined content is handed to the write pool
+        parts: List[bytes] = []
+        collect = parts.append
+        # Used for warnings only; raw entries do not add to it
         line_count = 0
         try:
-            for line in f:
+            line: Optional[bytes] = b""
+            while line is not None:
+                line = readline()
                 line_count += 1
-                line = line.rstrip("\n\r")
-
-                # Check for separator
-                if line == self.SEPARATOR:
-                    # Save previous file if exists
-                    if current_metadata and current_content is not None:
-                        try:
-                            await self._restore_file(
-                                output_path,
-                                current_metadata,
-                                current_encoding,
-                                current_content,
-                            )
-                            files_restored += 1
-
-                            if progress and total_files > 0:
-                                if progress_bar and task is not None:
-                                    progress_bar.update(task, advance=1)
-                                elif HAS_TQDM and tqdm and "pbar" in locals():
-                                    pbar.update(1)
-                                elif files_restored % 10 == 0:
-                                    print(
-                                        f"Extracted {files_restored}/{total_files} files...",
-                                        end="\r",
-                                    )
-                        except Exception as e:
-                            self.logger.error(
-                                f"Failed to restore file {current_metadata.get('path', 'unknown')}: {e}"
-                            )
 
-                    # Reset for next file
+                # Check for separator; the end of input closes the last entry
+                # the same way
+                if line is None or line == separator:
+                    self._check_cancelled()
+                    # An entry without an encoding line restores as empty
+                    if current_metadata:
+                        await wait_for_path(current_metadata["path"])
+                        await submit(current_metadata, None, b"")
                     current_metadata = None
-                    current_encoding = None
-                    current_content = []
-                    in_content = False
                     continue
 
                 # Check for metadata
-                if line.startswith(self.METADATA_PREFIX):
+                if line.startswith(metadata_prefix):
                     try:
-                        metadata_json = line[len(self.METADATA_PREFIX) :].strip()
-                        current_metadata = json.loads(metadata_json)
-                        in_content = False
+                        metadata_json = line[metadata_start:].strip()
+                        current_metadata = _loads_json(metadata_json)
                     except json.JSONDecodeError as e:
                         self.logger.warning(
                             f"Invalid metadata on line {line_count}: {e}"
                         )
-                    continue
-
-                # Check for encoding
-                if line.startswith(self.ENCODING_PREFIX):
-                    current_encoding = line[len(self.ENCODING_PREFIX) :].strip()
-                    in_content = True
+                        continue
+                    if (
+                        not isinstance(current_metadata, dict)
+                        or "path" not in current_metadata
+                    ):
+                        self.logger.warning(
+                            f"Metadata without a path on line {line_count}"
+                        )
+                        current_metadata = None
                     continue
 
                 # Skip header comments and empty lines before content
-                if not in_content and (line.startswith("#") or not line.strip()):
+                if not line.startswith(encoding_prefix):
                     continue
 
-                # Collect content (including empty lines within content)
-                if in_content and current_metadata:
-                    current_content.append(line)
-
-            # Handle last file
-            if current_metadata and current_content is not None:
-                try:
-                    await self._restore_file(
-                        output_path, current_metadata, current_encoding, current_content
+                encoding = line[encoding_start:].strip().decode("utf-8")
+                metadata, current_metadata = current_metadata, None
+                if not metadata:
+                    # Skip content that has no usable metadata
+                    line_count += reader.stream_block(separator, None) + 2
+                    continue
+                await wait_for_path(metadata["path"])
+                if encoding == "raw":
+                    # Exactly metadata["size"] bytes follow the line
+                    await finish(
+                        self._restore_raw_file(output_path, metadata, reader),
+                        metadata,
                     )
-                    files_restored += 1
-                    if progress and total_files > 0:
-                        if progress_bar and task is not None:
-                            progress_bar.update(task, advance=1)
-                        elif HAS_TQDM and tqdm and "pbar" in locals():
-                            pbar.update(1)
-                except Exception as e:
-                    self.logger.error(
-                        f"Failed to restore final file {current_metadata.get('path', 'unknown')}: {e}"
+                elif int(metadata.get("size") or 0) <= _BUFFERED_RESTORE_SIZE:
+                    line_count += reader.stream_block(separator, collect) + 2
+                    content = b"".join(parts)
+                    parts.clear()
+                    await submit(metadata, encoding, content)
+                else:
+                    # Content runs up to the next separator line
+                    newlines = await finish(
+                        self._restore_streamed_file(
+                            output_path, metadata, encoding, reader
+                        ),
+                        metadata,
                     )
+                    line_count += (newlines or 0) + 2
+                self._check_cancelled()
 
         finally:
+            if pending:
+                await asyncio.wait(pending.values())
+            write_pool.shutdown()
+            reader.close()
             if progress:
+                if unreported:
+                    report_progress()
                 if progress_bar:
                     progress_bar.stop()
-                elif HAS_TQDM and tqdm and "pbar" in locals():
+                elif pbar is not None:
                     pbar.close()
-                elif total_files > 0:
+                else:
                     print(f"\nExtracted {files_restored} files")
 
         return files_restored
 
     async def _parse_json_archive(self, f, output_path: Path, progress: bool = True) -> int:
-        """Parse JSON format archive and restore files"""
+        """Parse JSON format archive and restore files
+
+        ``f`` is a binary stream; the JSON parsers decode UTF-8 themselves.
+        """
         files_restored = 0
 
         try:
             content = f.read()
-            data = json.loads(content)
+            data = _loads_json(content)
 
             if "files" not in data:
                 self.logger.error("Invalid JSON archive: missing 'files' key")
@@ -2162,64 +3422,29 @@ class FileCombiner:
             files_list = data["files"]
             total_files = len(files_list)
 
-            # Setup progress
-            progress_bar = None
-            task = None
-            if progress and total_files > 0:
-                if HAS_RICH and self.console:
-                    progress_bar = Progress(
-                        SpinnerColumn(),
-                        TextColumn("[progress.description]{task.description}"),
-                        BarColumn(),
-                        MofNCompleteColumn(),
-                        TimeElapsedColumn(),
-                        console=self.console,
-                    )
-                    progress_bar.start()
-                    task = progress_bar.add_task("Extracting files", total=total_files)
-                elif HAS_TQDM and tqdm:
-                    pbar = tqdm(total=total_files, desc="Extracting files", unit="files")
-                else:
-                    print(f"Extracting {total_files} files...")
-
-            try:
-                for file_data in files_list:
-                    try:
-                        metadata = {
-                            "path": file_data.get("path", ""),
-                            "is_binary": file_data.get("is_binary", False),
-                            "ends_with_newline": file_data.get("ends_with_newline", True),
-                            "mode": file_data.get("mode", 0o644),
-                            "mtime": file_data.get("mtime", time.time()),
-                        }
-                        encoding = file_data.get("encoding", "utf-8")
-                        content = file_data.get("content", "")
-
-                        # Convert content to lines for _restore_file
-                        content_lines = content.split("\n") if content else []
-
-                        await self._restore_file(output_path, metadata, encoding, content_lines)
-                        files_restored += 1
-
-                        if progress and total_files > 0:
-                            if progress_bar and task is not None:
-                                progress_bar.update(task, advance=1)
-                            elif HAS_TQDM and tqdm and "pbar" in locals():
-                                pbar.update(1)
-                            elif files_restored % 10 == 0:
-                                print(f"Extracted {files_restored}/{total_files} files...", end="\r")
+            entries = []
+            for file_data in files_list:
+                try:
+                    metadata = {
+                        "path": file_data.get("path", ""),
+                        "is_binary": file_data.get("is_binary", False),
+                        "ends_with_newline": file_data.get("ends_with_newline", True),
+                        "mode": file_data.get("mode", 0o644),
+                        "mtime": file_data.get("mtime", time.time()),
+                    }
+                    encoding = file_data.get("encoding", "utf-8")
+                    content = file_data.get("content", "")
+                except Exception as e:
+                    self.logger.error(f"Failed to restore file {file_data.get('path', 'unknown')}: {e}")
+                    continue
 
-                    except Exception as e:
-                        self.logger.error(f"Failed to restore file {file_data.get('path', 'unknown')}: {e}")
+                # Hand the content over whole; splitting it into lines
+                # would only be joined back when writing
+                entries.append((metadata, encoding, [content] if content else []))
 
-            finally:
-                if progress:
-                    if progress_bar:
-                        progress_bar.stop()
-                    elif HAS_TQDM and tqdm and "pbar" in locals():
-                        pbar.close()
-                    elif total_files > 0:
-                        print(f"\nExtracted {files_restored} files")
+            files_restored = await self._restore_parsed_files(
+                output_path, entries, total_files, progress
+            )
 
         except json.JSONDecodeError as e:
             self.logger.error(f"Invalid JSON archive: {e}")
@@ -2240,64 +3465,29 @@ class FileCombiner:
             files_list = root.findall("file")
             total_files = len(files_list)
 
-            # Setup progress
-            progress_bar = None
-            task = None
-            if progress and total_files > 0:
-                if HAS_RICH and self.console:
-                    progress_bar = Progress(
-                        SpinnerColumn(),
-                        TextColumn("[progress.description]{task.description}"),
-                        BarColumn(),
-                        MofNCompleteColumn(),
-                        TimeElapsedColumn(),
-                        console=self.console,
-                    )
-                    progress_bar.start()
-                    task = progress_bar.add_task("Extracting files", total=total_files)
-                elif HAS_TQDM and tqdm:
-                    pbar = tqdm(total=total_files, desc="Extracting files", unit="files")
-                else:
-                    print(f"Extracting {total_files} files...")
-
-            try:
-                for file_elem in files_list:
-                    try:
-                        metadata = {
-                            "path": file_elem.get("path", ""),
-                            "is_binary": file_elem.get("is_binary", "false").lower() == "true",
-                            "ends_with_newline": file_elem.get("ends_with_newline", "true").lower() == "true",
-                            "mode": int(file_elem.get("mode", "33188")),  # 0o644 in decimal
-                            "mtime": float(file_elem.get("mtime", str(time.time()))),
-                        }
-                        encoding = file_elem.get("encoding", "utf-8")
-                        content = file_elem.text or ""
-
-                        # Convert content to lines for _restore_file
-                        content_lines = content.split("\n") if content else []
-
-                        await self._restore_file(output_path, metadata, encoding, content_lines)
-                        files_restored += 1
-
-                        if progress and total_files > 0:
-                            if progress_bar and task is not None:
-                                progress_bar.update(task, advance=1)
-                            elif HAS_TQDM and tqdm and "pbar" in locals():
-                                pbar.update(1)
-                            elif files_restored % 10 == 0:
-                                print(f"Extracted {files_restored}/{total_files} files...", end="\r")
+            entries = []
+            for file_elem in files_list:
+                try:
+                    metadata = {
+                        "path": file_elem.get("path", ""),
+                        "is_binary": file_elem.get("is_binary", "false").lower() == "true",
+                        "ends_with_newline": file_elem.get("ends_with_newline", "true").lower() == "true",
+                        "mode": int(file_elem.get("mode", "33188")),  # 0o644 in decimal
+                        "mtime": float(file_elem.get("mtime", str(time.time()))),
+                    }
+                    encoding = file_elem.get("encoding", "utf-8")
+                    content = file_elem.text or ""
+                except Exception as e:
+                    self.logger.error(f"Failed to restore file {file_elem.get('path', 'unknown')}: {e}")
+                    continue
 
-                    except Exception as e:
-                        self.logger.error(f"Failed to restore file {file_elem.get('path', 'unknown')}: {e}")
+                # Hand the content over whole; splitting it into lines
+                # would only be joined back when writing
+                entries.append((metadata, encoding, [content] if content else []))
 
-            finally:
-                if progress:
-                    if progress_bar:
-                        progress_bar.stop()
-                    elif HAS_TQDM and tqdm and "pbar" in locals():
-                        pbar.close()
-                    elif total_files > 0:
-                        print(f"\nExtracted {files_restored} files")
+            files_restored = await self._restore_parsed_files(
+                output_path, entries, total_files, progress
+            )
 
         except ET.ParseError as e:
             self.logger.error(f"Invalid XML archive: {e}")
@@ -2356,62 +3546,23 @@ class FileCombiner:
 
             total_files = len(files_list)
 
-            # Setup progress
-            progress_bar = None
-            task = None
-            if progress and total_files > 0:
-                if HAS_RICH and self.console:
-                    progress_bar = Progress(
-                        SpinnerColumn(),
-                        TextColumn("[progress.description]{task.description}"),
-                        BarColumn(),
-                        MofNCompleteColumn(),
-                        TimeElapsedColumn(),
-                        console=self.console,
-                    )
-                    progress_bar.start()
-                    task = progress_bar.add_task("Extracting files", total=total_files)
-                elif HAS_TQDM and tqdm:
-                    pbar = tqdm(total=total_files, desc="Extracting files", unit="files")
-                else:
-                    print(f"Extracting {total_files} files...")
-
-            try:
-                for file_data in files_list:
-                    try:
-                        metadata = {
-                            "path": file_data.get("path", ""),
-                            "is_binary": file_data.get("is_binary", False),
-                            "ends_with_newline": True,  # YAML format always has trailing newlines
-                            "mode": file_data.get("mode", 0o644),
-                            "mtime": file_data.get("mtime", time.time()),
-                        }
-                        encoding = file_data.get("encoding", "utf-8")
-
-                        await self._restore_file(
-                            output_path, metadata, encoding, file_data.get("content_lines", [])
-                        )
-                        files_restored += 1
-
-                        if progress and total_files > 0:
-                            if progress_bar and task is not None:
-                                progress_bar.update(task, advance=1)
-                            elif HAS_TQDM and tqdm and "pbar" in locals():
-                                pbar.update(1)
-                            elif files_restored % 10 == 0:
-                                print(f"Extracted {files_restored}/{total_files} files...", end="\r")
-
-                    except Exception as e:
-                        self.logger.error(f"Failed to restore file {file_data.get('path', 'unknown')}: {e}")
-
-            finally:
-                if progress:
-                    if progress_bar:
-                        progress_bar.stop()
-                    elif HAS_TQDM and tqdm and "pbar" in locals():
-                        pbar.close()
-                    elif total_files > 0:
-                        print(f"\nExtracted {files_restored} files")
+            entries = [
+                (
+                    {
+                        "path": file_data.get("path", ""),
+                        "is_binary": file_data.get("is_binary", False),
+                        "ends_with_newline": True,  # YAML format always has trailing newlines
+                        "mode": file_data.get("mode", 0o644),
+                        "mtime": file_data.get("mtime", time.time()),
+                    },
+                    file_data.get("encoding", "utf-8"),
+                    file_data.get("content_lines", []),
+                )
+                for file_data in files_list
+            ]
+            files_restored = await self._restore_parsed_files(
+                output_path, entries, total_files, progress
+            )
 
         except Exception as e:
             self.logger.error(f"Error parsing YAML archive: {e}")
@@ -2499,137 +3650,413 @@ class FileCombiner:
 
             total_files = len(files_list)
 
-            # Setup progress
-            progress_bar = None
-            task = None
-            if progress and total_files > 0:
-                if HAS_RICH and self.console:
-                    progress_bar = Progress(
-                        SpinnerColumn(),
-                        TextColumn("[progress.description]{task.description}"),
-                        BarColumn(),
-                        MofNCompleteColumn(),
-                        TimeElapsedColumn(),
-                        console=self.console,
-                    )
-                    progress_bar.start()
-                    task = progress_bar.add_task("Extracting files", total=total_files)
-                elif HAS_TQDM and tqdm:
-                    pbar = tqdm(total=total_files, desc="Extracting files", unit="files")
-                else:
-                    print(f"Extracting {total_files} files...")
+            entries = [
+                (
+                    {
+                        "path": file_data.get("path", ""),
+                        "is_binary": file_data.get("is_binary", False),
+                        "ends_with_newline": True,
+                        "mode": 0o644,
+                        "mtime": time.time(),
+                    },
+                    file_data.get("encoding", "utf-8"),
+                    file_data.get("content_lines", []),
+                )
+                for file_data in files_list
+            ]
+            files_restored = await self._restore_parsed_files(
+                output_path, entries, total_files, progress
+            )
 
-            try:
-                for file_data in files_list:
-                    try:
-                        metadata = {
-                            "path": file_data.get("path", ""),
-                            "is_binary": file_data.get("is_binary", False),
-                            "ends_with_newline": True,
-                            "mode": 0o644,
-                            "mtime": time.time(),
-                        }
-                        encoding = file_data.get("encoding", "utf-8")
-
-                        await self._restore_file(
-                            output_path, metadata, encoding, file_data.get("content_lines", [])
-                        )
-                        files_restored += 1
+        except Exception as e:
+            self.logger.error(f"Error parsing Markdown archive: {e}")
+            return 0
 
-                        if progress and total_files > 0:
-                            if progress_bar and task is not None:
-                                progress_bar.update(task, advance=1)
-                            elif HAS_TQDM and tqdm and "pbar" in locals():
-                                pbar.update(1)
-                            elif files_restored % 10 == 0:
-                                print(f"Extracted {files_restored}/{total_files} files...", end="\r")
+        return files_restored
 
-                    except Exception as e:
-                        self.logger.error(f"Failed to restore file {file_data.get('path', 'unknown')}: {e}")
+    async def _restore_parsed_files(
+        self,
+        output_path: Path,
+        entries: Sequence[Tuple[dict, str, Sequence[str]]],
+        total_files: int,
+        progress: bool,
+    ) -> int:
+        """Restore the parsed entries of a JSON, XML, YAML or Markdown archive.
 
-            finally:
-                if progress:
-                    if progress_bar:
-                        progress_bar.stop()
-                    elif HAS_TQDM and tqdm and "pbar" in locals():
-                        pbar.close()
-                    elif total_files > 0:
-                        print(f"\nExtracted {files_restored} files")
+        Files are written in batches by a pool of max_workers threads (or
+        inline with a single worker), fed from a worker thread so the event
+        loop stays free. A batch holding a path that is still being written
+        waits for that write, so a path repeated in an archive ends with
+        its last content. Returns the number of files restored.
+        """
+        progress_bar = None
+        task = None
+        pbar = None
+        if progress and total_files > 0:
+            if HAS_RICH and self.console:
+                progress_bar = self._start_rich_progress()
+                task = progress_bar.add_task("Extracting files", total=total_files)
+            elif HAS_TQDM:
+                pbar = self._tqdm_progress(total_files, "Extracting files")
+            else:
+                print(f"Extracting {total_files} files...")
 
-        except Exception as e:
-            self.logger.error(f"Error parsing Markdown archive: {e}")
-            return 0
+        files_restored = 0
+
+        def report(path: str, error: Optional[Exception]) -> None:
+            nonlocal files_restored
+            if error is not None:
+                self.logger.error(f"Failed to restore file {path}: {error}")
+                return
+            files_restored += 1
+            if progress_bar and task is not None:
+                progress_bar.update(task, advance=1)
+            elif pbar is not None:
+                pbar.update(1)
+            elif progress and total_files > 0 and files_restored % 10 == 0:
+                print(f"Extracted {files_restored}/{total_files} files...", end="\r")
+
+        def restore_batch(
+            batch: Sequence[Tuple[dict, str, Sequence[str]]]
+        ) -> List[Tuple[str, Optional[Exception]]]:
+            results: List[Tuple[str, Optional[Exception]]] = []
+            for metadata, encoding, content_lines in batch:
+                try:
+                    self._restore_file_sync(
+                        output_path, metadata, encoding, content_lines
+                    )
+                    results.append((metadata["path"], None))
+                except Exception as e:
+                    results.append((metadata["path"], e))
+            return results
+
+        def restore_all() -> None:
+            # About four batches per worker, so there is one thread hop per
+            # batch rather than per file
+            batch_size = max(
+                1, min(_METADATA_BATCH, len(entries) // (self.max_workers * 4))
+            )
+            batches = [
+                entries[i : i + batch_size] for i in range(0, len(entries), batch_size)
+            ]
+            if self.max_workers <= 1:
+                for batch in batches:
+                    self._check_cancelled()
+                    for path, error in restore_batch(batch):
+                        report(path, error)
+                return
+
+            # Batches are collected in submission order, with at most
+            # 2 * max_workers queued; latest maps a path to its last batch
+            queued: collections.deque[Future] = collections.deque()
+            latest: Dict[str, Future] = {}
+
+            def finish() -> None:
+                future = queued.popleft()
+                for path, error in future.result():
+                    if latest.get(path) is future:
+                        del latest[path]
+                    report(path, error)
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                for batch in batches:
+                    self._check_cancelled()
+                    for metadata, _, _ in batch:
+                        earlier = latest.get(metadata["path"])
+                        if earlier is not None:
+                            # A repeated path is written after its earlier
+                            # copy; restore_batch reports errors, not raises
+                            earlier.exception()
+                    future = pool.submit(restore_batch, batch)
+                    for metadata, _, _ in batch:
+                        latest[metadata["path"]] = future
+                    queued.append(future)
+                    while queued and (
+                        queued[0].done() or len(queued) > 2 * self.max_workers
+                    ):
+                        finish()
+                while queued:
+                    finish()
+
+        try:
+            await run_in_thread(restore_all)
+        finally:
+            if progress:
+                if progress_bar:
+                    progress_bar.stop()
+                elif pbar is not None:
+                    pbar.close()
+                elif total_files > 0:
+                    print(f"\nExtracted {files_restored} files")
 
         return files_restored
 
     def _restore_file_sync(
-        self, output_path: Path, metadata: dict, encoding: str, content_lines: List[str]
+        self,
+        output_path: Path,
+        metadata: dict,
+        encoding: Optional[str],
+        content_lines: Sequence[str],
     ):
-        """Synchronous file restoration (runs in thread pool for async)"""
-        # SECURITY: Sanitize path to prevent path traversal attacks
-        file_path = self._sanitize_path(output_path, metadata["path"])
+        """Restore one file from the str content lines of a structured archive.
 
-        # Ensure parent directories exist
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Reconstruct content properly
-        if not content_lines:
-            content = ""
+        Run on the write pool of the structured parsers, which hold the
+        whole archive in memory.
+        """
+        if encoding == "base64" or metadata.get("is_binary", False):
+            # _b64decode skips line breaks and takes ASCII str directly, so
+            # neither newline fixup nor encode is needed
+            data = _b64decode("\n".join(content_lines))
+            with self._open_restore_target(output_path, metadata) as f:
+                f.write(data)
+                self._restore_file_attributes(f, metadata)
         else:
-            # Join lines with newlines (preserving original line breaks)
-            content = "\n".join(content_lines)
-
-            # Handle trailing newline based on original file
-            ends_with_newline = metadata.get(
-                "ends_with_newline", True
-            )  # Default to True for backward compatibility
-            if ends_with_newline and not content.endswith("\n"):
-                content += "\n"
-            elif not ends_with_newline and content.endswith("\n"):
-                content = content.rstrip("\n")
-
-        # Write file based on encoding
+            with self._open_restore_target(output_path, metadata) as f:
+                # Encode and write the lines in batches instead of joining
+                # and encoding them whole
+                written = self._write_text_lines(f, content_lines)
+                trailing = _count_trailing_newlines(content_lines)
+                self._fix_trailing_newline(f, metadata, written, trailing)
+                self._restore_file_attributes(f, metadata)
+
+        if self.verbose:
+            self.logger.debug(f"Restored: {metadata['path']}")
+
+    def _restore_bytes_file_sync(
+        self,
+        output_path: Path,
+        metadata: dict,
+        encoding: Optional[str],
+        content: bytes,
+    ):
+        """Restore one file from the content bytes of a txt archive entry.
+
+        Run on the txt parser's write pool for entries small enough to be
+        read into memory.
+        """
         if encoding == "base64" or metadata.get("is_binary", False):
-            # Decode base64 content
-            binary_content = base64.b64decode(content)
-            with open(file_path, "wb") as f:
-                f.write(binary_content)
+            data = _b64decode(content)
+            with self._open_restore_target(output_path, metadata) as f:
+                f.write(data)
+                self._restore_file_attributes(f, metadata)
         else:
-            # Write text content
-            with open(file_path, "w", encoding="utf-8") as f:
+            with self._open_restore_target(output_path, metadata) as f:
+                # The content is written as is; its trailing newlines are
+                # counted in place rather than on a stripped copy
+                written = len(content)
+                trailing = 0
+                while trailing < written and content[-1 - trailing] == 0x0A:
+                    trailing += 1
                 f.write(content)
+                self._fix_trailing_newline(f, metadata, written, trailing)
+                self._restore_file_attributes(f, metadata)
+
+        if self.verbose:
+            self.logger.debug(f"Restored: {metadata['path']}")
+
+    @staticmethod
+    def _fix_trailing_newline(
+        f: BinaryIO, metadata: dict, written: int, trailing: int
+    ) -> None:
+        """Match the original file's trailing newline after a text restore.
+
+        ``written`` bytes were written, ending in ``trailing`` newlines.
+        """
+        # Default to True for backward compatibility
+        if metadata.get("ends_with_newline", True):
+            if written and not trailing:
+                f.write(b"\n")
+        elif trailing:
+            f.truncate(written - trailing)
+
+    @staticmethod
+    def _write_text_lines(f: BinaryIO, lines: Sequence[str]) -> int:
+        """Write ``"\\n".join(lines)`` as UTF-8 and return the byte count
+
+        Lines are joined ``_TEXT_WRITE_BATCH`` at a time and encoded in
+        slices of ``_TEXT_WRITE_CHARS`` characters, so the extra memory is
+        bounded by one batch rather than two full copies. A single-element
+        list is written without joining at all.
+        """
+        written = 0
+        for start in range(0, len(lines), _TEXT_WRITE_BATCH):
+            if start:
+                written += f.write(b"\n")
+            text = "\n".join(lines[start : start + _TEXT_WRITE_BATCH])
+            for pos in range(0, len(text), _TEXT_WRITE_CHARS):
+                written += f.write(text[pos : pos + _TEXT_WRITE_CHARS].encode("utf-8"))
+        return written
+
+    def _open_restore_target(self, output_path: Path, metadata: dict) -> BinaryIO:
+        """Sanitize an entry's path and open the file for writing.
+
+        Parent directories created earlier in the split are remembered, so
+        each file costs one mkdir at most and a single open.
+        """
+        # SECURITY: Sanitize path to prevent path traversal attacks
+        file_path = self._sanitize_path(output_path, metadata["path"])
+
+        # Ensure parent directories exist; mkdir creates the missing
+        # ancestors too, so remember those up to the first known one
+        parent = file_path.parent
+        if parent not in self._restored_dirs:
+            parent.mkdir(parents=True, exist_ok=True)
+            for directory in (parent, *parent.parents):
+                if directory in self._restored_dirs:
+                    break
+                self._restored_dirs.add(directory)
+
+        fd = os.open(file_path, _RESTORE_OPEN_FLAGS, 0o666)
+        return open(fd, "wb")
 
-        # Restore file metadata if requested
+    def _restore_file_attributes(self, f: BinaryIO, metadata: dict) -> None:
+        """Restore mode and mtime through the open file if requested.
+
+        Must run after the last write; the file is flushed first so closing
+        it does not touch the mtime again.
+        """
         if self.preserve_permissions and "mode" in metadata and "mtime" in metadata:
             try:
-                os.chmod(file_path, metadata["mode"])
-                os.utime(file_path, (metadata["mtime"], metadata["mtime"]))
+                f.flush()
+                fd = f.fileno()
+                if hasattr(os, "fchmod"):
+                    os.fchmod(fd, metadata["mode"])
+                else:
+                    os.chmod(f.name, metadata["mode"])
+                times = (metadata["mtime"], metadata["mtime"])
+                if os.utime in os.supports_fd:
+                    os.utime(fd, times)
+                else:
+                    os.utime(f.name, times)
             except (OSError, PermissionError) as e:
                 if self.verbose:
                     self.logger.warning(
                         f"Cannot restore metadata for {metadata['path']}: {e}"
                     )
 
-    async def _restore_file(
-        self, output_path: Path, metadata: dict, encoding: str, content_lines: List[str]
-    ):
-        """Restore individual file with proper content reconstruction (async via thread pool)"""
+    def _restore_streamed_file_sync(
+        self, output_path: Path, metadata: dict, encoding: str, src: _ArchiveReader
+    ) -> int:
+        """Restore a txt archive entry by streaming its content to disk.
+
+        Content is written as it is read, so memory stays bounded by the
+        read chunk size; base64 is decoded incrementally. The entry is
+        always consumed, even when the file cannot be written, so the
+        parser stays aligned with the next entry. Returns the number of
+        content lines read.
+        """
         try:
-            await run_in_thread(
-                self._restore_file_sync, output_path, metadata, encoding, content_lines
-            )
-            if self.verbose:
-                self.logger.debug(f"Restored: {metadata['path']}")
-        except (base64.binascii.Error, ValueError) as e:
-            self.logger.error(
-                f"Invalid base64 content for {metadata['path']}: {e}"
-            )
-        except Exception as e:
-            self.logger.error(
-                f"Error restoring file {metadata.get('path', 'unknown')}: {e}"
-            )
+            dst = self._open_restore_target(output_path, metadata)
+        except Exception:
+            src.stream_block(self._SEPARATOR_BYTES, None)
             raise
 
+        try:
+            if encoding == "base64" or metadata.get("is_binary", False):
+                # The decoded size is known up front
+                size = int(metadata.get("size") or 0)
+                _preallocate(dst, size)
+                pending = b""
+                decoded = 0
+
+                def write(data: bytes) -> None:
+                    nonlocal pending, decoded
+                    # Decode whole 4-character quanta; _b64decode would skip
+                    # line breaks, but they would throw the quantum count off
+                    data = pending + data.translate(None, b"\r\n")
+                    cut = len(data) - len(data) % 4
+                    pending = data[cut:]
+                    decoded += dst.write(_b64decode(data[:cut]))
+
+                newlines = src.stream_block(self._SEPARATOR_BYTES, write)
+                if pending:
+                    decoded += dst.write(_b64decode(pending))
+                if decoded < size:
+                    # Drop the unused part of the preallocation
+                    dst.truncate(decoded)
+            else:
+                written = 0
+                trailing = 0
+
+                def write(data: bytes) -> None:
+                    nonlocal written, trailing
+                    dst.write(data)
+                    written += len(data)
+                    # Track the run of trailing newlines across pieces
+                    i = len(data)
+                    while i and data[i - 1] == 0x0A:
+                        i -= 1
+                    trailing = trailing + len(data) if i == 0 else len(data) - i
+
+                newlines = src.stream_block(self._SEPARATOR_BYTES, write)
+
+                # Handle trailing newline based on original file
+                ends_with_newline = metadata.get(
+                    "ends_with_newline", True
+                )  # Default to True for backward compatibility
+                if written and ends_with_newline and not trailing:
+                    dst.write(b"\n")
+                elif not ends_with_newline and trailing:
+                    dst.truncate(written - trailing)
+            self._restore_file_attributes(dst, metadata)
+        finally:
+            dst.close()
+
+        return newlines
+
+    async def _restore_streamed_file(
+        self, output_path: Path, metadata: dict, encoding: str, src: _ArchiveReader
+    ) -> int:
+        """Async wrapper for _restore_streamed_file_sync"""
+        newlines: int = await run_in_thread(
+            self._restore_streamed_file_sync, output_path, metadata, encoding, src
+        )
+        if self.verbose:
+            self.logger.debug(f"Restored: {metadata['path']}")
+        return newlines
+
+    def _restore_raw_file_sync(
+        self, output_path: Path, metadata: dict, src: _ArchiveReader
+    ) -> None:
+        """Restore a raw-embedded file by copying its bytes out of the archive.
+
+        The entry's bytes are always consumed, even when the file cannot be
+        written, so the parser stays aligned with the next entry.
+        """
+        count = int(metadata.get("size", 0))
+        error: Optional[Exception] = None
+        dst = None
+        try:
+            dst = self._open_restore_target(output_path, metadata)
+        except Exception as e:
+            error = e
+
+        try:
+            if dst is not None:
+                _preallocate(dst, count)
+            copied = src.copy_to(dst, count)
+            if dst is not None and copied == count:
+                self._restore_file_attributes(dst, metadata)
+            elif dst is not None:
+                # Drop the unused part of the preallocation
+                dst.truncate(copied)
+        finally:
+            if dst is not None:
+                dst.close()
+
+        if error is not None:
+            raise error
+        if copied != count:
+            raise FileCombinerError(f"Archive truncated inside {metadata['path']}")
+
+    async def _restore_raw_file(
+        self, output_path: Path, metadata: dict, src: _ArchiveReader
+    ) -> None:
+        """Async wrapper for _restore_raw_file_sync"""
+        await run_in_thread(self._restore_raw_file_sync, output_path, metadata, src)
+        if self.verbose:
+            self.logger.debug(f"Restored: {metadata['path']}")
+
     def _sanitize_path(self, base_dir: Path, unsafe_relative_path: str) -> Path:
         """
         Sanitize and validate extraction path to prevent path traversal attacks.
@@ -2674,7 +4101,9 @@ class FileCombiner:
 
         return target_path
 
-    def _get_safe_fence(self, content: str, base_fence: str = "```") -> str:
+    def _get_safe_fence(
+        self, content: Union[str, bytes], base_fence: str = "```"
+    ) -> str:
         """
         Calculate a safe code fence that won't be broken by content.
 
@@ -2682,31 +4111,24 @@ class FileCombiner:
         For example, if content has ``` inside, returns ```` instead.
 
         Args:
-            content: The content to be wrapped in code fence
+            content: The content to be wrapped in code fence (str or UTF-8
+                bytes)
             base_fence: The base fence string (default: ```)
 
         Returns:
             A fence string that is safe to use with this content
         """
-        fence = base_fence
-        backtick_char = "`"
-
-        # Find the longest sequence of backticks in content
-        max_backticks = 0
-        current_count = 0
-
-        for char in content:
-            if char == backtick_char:
-                current_count += 1
-                max_backticks = max(max_backticks, current_count)
-            else:
-                current_count = 0
-
-        # If content has backtick sequences >= our fence, make fence longer
-        if max_backticks >= len(fence):
-            fence = backtick_char * (max_backticks + 1)
-
-        return fence
+        # Grow the fence until no backtick run in the content is as long;
+        # each probe is one substring search in C rather than a Python
+        # loop over every character
+        width = len(base_fence)
+        if isinstance(content, bytes):
+            while b"`" * width in content:
+                width += 1
+        else:
+            while "`" * width in content:
+                width += 1
+        return "`" * width
 
     def _cleanup_temp_files(self):
         """Clean up any temporary files and directories"""
@@ -2730,7 +4152,7 @@ class FileCombiner:
 
 def create_config_file(config_path: Path) -> bool:
     """Create a default configuration file"""
-    default_config = """# File Combiner Configuration
+    default_config = """# File Combiner Configuration (TOML)
 # Uncomment and modify values as needed
 
 # Maximum file size to include (e.g., "10M", "500K", "1G")
@@ -2739,11 +4161,25 @@ def create_config_file(config_path: Path) -> bool:
 # Maximum number of worker threads for parallel processing
 # max_workers = 8
 
+# Files read at once while combining (default: max_workers, at most 8);
+# 1 suits spinning disks
+# read_concurrency = 8
+
 # Maximum directory depth to traverse
 # max_depth = 50
 
 # Compression level for gzip (1-9, higher = better compression but slower)
-# compression_level = 6
+# compression_level = 1
+
+# Compression profile overriding both levels: "latency" (gzip 1 / zstd 3),
+# "balanced" (6 / 12, latency levels below 16 MB) or "archive" (9 / 19)
+# compression_profile = "balanced"
+
+# gzip implementation: "auto" (fastest installed), "isal", "zlib-ng" or "gzip"
+# compression_backend = "auto"
+
+# Compression level for .zst outputs (1-5 fast, 10-15 balanced, 19-22 archival)
+# zstd_level = 3
 
 # Additional patterns to exclude (glob-style patterns)
 # exclude_patterns = [
@@ -2761,13 +4197,15 @@ def create_config_file(config_path: Path) -> bool:
 
 # Feature flags
 # calculate_checksums = false
+# checksum_algorithm = "sha256"  # or "blake3" / "xxh3" (need blake3 / xxhash)
 # preserve_permissions = false
 # follow_symlinks = false
 # ignore_binary = false
+# embed_binary_raw = false
 # verbose = false
 
 # Buffer size for file I/O operations (in bytes)
-# buffer_size = 65536
+# buffer_size = 1048576
 """
 
     try:
@@ -2781,11 +4219,33 @@ def create_config_file(config_path: Path) -> bool:
 
 
 def load_config_file(config_path: Path) -> Dict:
-    """Load configuration from file with error handling"""
+    """Load configuration from file with error handling.
+
+    The file is parsed as TOML. Files that are not valid TOML (older
+    configs with unquoted values) and interpreters without tomllib or
+    tomli go through the simple key = value parser instead.
+    """
     if not config_path.exists():
         return {}
 
+    if HAS_TOMLLIB:
+        try:
+            with open(config_path, "rb") as f:
+                config: dict = tomllib.load(f)
+            return config
+        except tomllib.TOMLDecodeError:
+            pass
+        except OSError as e:
+            print(f"Warning: Error loading config file: {e}")
+            return {}
+
+    return _load_simple_config(config_path)
+
+
+def _load_simple_config(config_path: Path) -> Dict:
+    """Parse a flat key = value config file line by line"""
     config = {}
+    line_num = 0
     try:
         with open(config_path, "r") as f:
             for line_num, line in enumerate(f, 1):
@@ -2818,8 +4278,19 @@ def load_config_file(config_path: Path) -> Dict:
     return config
 
 
-async def main():
-    """Main entry point with comprehensive error handling"""
+def _err(msg: str) -> None:
+    """Write an error line straight to the stderr byte stream"""
+    buf = getattr(sys.stderr, "buffer", None)
+    if buf is None:
+        # stderr replaced by a text-only stream (e.g. captured in tests)
+        sys.stderr.write(msg + "\n")
+        return
+    buf.write(msg.encode("utf-8", "replace") + b"\n")
+    buf.flush()
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser"""
     parser = argparse.ArgumentParser(
         description="High-performance file combiner for large repositories and AI agents",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -2901,6 +4372,11 @@ Examples:
     parser.add_argument(
         "-j", "--jobs", type=int, default=os.cpu_count(), help="Worker threads"
     )
+    parser.add_argument(
+        "--read-concurrency",
+        type=int,
+        help="Files read at once while combining (default: jobs, at most 8)",
+    )
     parser.add_argument(
         "-p", "--preserve-permissions", action="store_true", help="Preserve permissions"
     )
@@ -2910,13 +4386,52 @@ Examples:
     parser.add_argument(
         "--ignore-binary", action="store_true", help="Skip binary files"
     )
+    parser.add_argument(
+        "--embed-binary-raw",
+        action="store_true",
+        help="Embed binary files as raw bytes in uncompressed txt archives",
+    )
     parser.add_argument("--checksum", action="store_true", help="Calculate checksums")
+    parser.add_argument(
+        "--checksum-algorithm",
+        choices=["sha256", "blake3", "xxh3"],
+        default=None,
+        help="Checksum algorithm (blake3 and xxh3 are faster; need blake3 / xxhash)",
+    )
     parser.add_argument(
         "--compression-level",
         type=int,
-        default=6,
+        default=None,
         choices=range(1, 10),
-        help="Compression level",
+        metavar="{1-9}",
+        help="gzip compression level (1 fastest, 9 smallest; default 1)",
+    )
+    profile_group = parser.add_mutually_exclusive_group()
+    for profile, profile_help in (
+        ("latency", "Compress for speed (gzip 1, zstd 3)"),
+        ("balanced", "Balance speed and size (gzip 6, zstd 12; fast below 16 MB)"),
+        ("archive", "Compress for size (gzip 9, zstd 19)"),
+    ):
+        profile_group.add_argument(
+            f"--{profile}",
+            dest="compression_profile",
+            action="store_const",
+            const=profile,
+            help=f"{profile_help}; overrides the compression levels",
+        )
+    parser.add_argument(
+        "--compression-backend",
+        choices=["auto", "isal", "zlib-ng", "gzip"],
+        default=None,
+        help="gzip implementation (auto picks isal or zlib-ng when installed)",
+    )
+    parser.add_argument(
+        "--zstd-level",
+        type=int,
+        default=None,
+        choices=range(1, 23),
+        metavar="{1-22}",
+        help="Compression level for .zst outputs (1-5 fast, 10-15 balanced, 19-22 archival)",
     )
     parser.add_argument(
         "--format",
@@ -2948,8 +4463,15 @@ Examples:
         "--version", action="version", version=f"%(prog)s {__version__}"
     )
 
-    args = parser.parse_args()
+    return parser
+
 
+def _run_sync_command(args: argparse.Namespace) -> Optional[int]:
+    """Handle the commands that need no event loop.
+
+    Returns the exit status if ``args`` was fully handled here (a
+    mistyped operation or --create-config), otherwise None.
+    """
     # Fuzzy command matching for typos
     valid_operations = ["combine", "split"]
     if args.operation not in valid_operations:
@@ -2957,38 +4479,58 @@ Examples:
             args.operation, valid_operations, n=1, cutoff=0.6
         )
         if close_matches:
-            print(
-                f"Unknown command '{args.operation}'. Did you mean '{close_matches[0]}'?",
-                file=sys.stderr,
+            _err(
+                f"Unknown command '{args.operation}'. Did you mean '{close_matches[0]}'?"
             )
-            print(f"Usage: file-combiner {close_matches[0]} <input> <output>", file=sys.stderr)
+            _err(f"Usage: file-combiner {close_matches[0]} <input> <output>")
         else:
-            print(
-                f"Unknown command '{args.operation}'. Valid commands: {', '.join(valid_operations)}",
-                file=sys.stderr,
+            _err(
+                f"Unknown command '{args.operation}'. Valid commands: {', '.join(valid_operations)}"
             )
         return 1
 
-    try:
-        # Handle config creation
-        if args.create_config:
-            if create_config_file(args.config):
-                print(f"Created default configuration file: {args.config}")
-            else:
-                print(f"Failed to create configuration file: {args.config}")
-                return 1
-            return 0
+    # Handle config creation
+    if args.create_config:
+        if create_config_file(args.config):
+            print(f"Created default configuration file: {args.config}")
+        else:
+            print(f"Failed to create configuration file: {args.config}")
+            return 1
+        return 0
+
+    return None
+
+
+async def main(
+    cancel_event: Optional[threading.Event] = None,
+    args: Optional[argparse.Namespace] = None,
+):
+    """Main entry point with comprehensive error handling.
+
+    ``args`` are parsed from the command line when not given.
+    """
+    if args is None:
+        args = _build_parser().parse_args()
+
+    status = _run_sync_command(args)
+    if status is not None:
+        return status
 
+    try:
         # Validate required arguments
         if (
             not hasattr(args, "operation")
             or not args.input_path
             or not args.output_path
         ):
-            parser.error("operation, input_path, and output_path are required")
+            _build_parser().error(
+                "operation, input_path, and output_path are required"
+            )
 
         # Load configuration
         config = load_config_file(args.config)
+        if cancel_event is not None:
+            config["cancel_event"] = cancel_event
 
         # Override config with command line arguments
         config.update(
@@ -2996,18 +4538,30 @@ Examples:
                 "max_file_size": args.max_size,
                 "max_workers": args.jobs,
                 "max_depth": args.max_depth,
-                "compression_level": args.compression_level,
                 "exclude_patterns": args.exclude,
                 "include_patterns": args.include,
                 "calculate_checksums": args.checksum,
                 "preserve_permissions": args.preserve_permissions,
                 "follow_symlinks": args.follow_symlinks,
                 "ignore_binary": args.ignore_binary,
+                "embed_binary_raw": args.embed_binary_raw,
                 "dry_run": args.dry_run,
                 "verbose": args.verbose,
                 "respect_gitignore": not args.no_gitignore,
             }
         )
+        if args.compression_level is not None:
+            config["compression_level"] = args.compression_level
+        if args.compression_profile is not None:
+            config["compression_profile"] = args.compression_profile
+        if args.read_concurrency is not None:
+            config["read_concurrency"] = args.read_concurrency
+        if args.zstd_level is not None:
+            config["zstd_level"] = args.zstd_level
+        if args.compression_backend is not None:
+            config["compression_backend"] = args.compression_backend
+        if args.checksum_algorithm is not None:
+            config["checksum_algorithm"] = args.checksum_algorithm
 
         # Handle progress bar options
         progress = not args.no_progress
@@ -3028,18 +4582,18 @@ Examples:
                 args.input_path, args.output_path, progress=progress
             )
         else:
-            parser.error(f"Unknown operation: {args.operation}")
+            _build_parser().error(f"Unknown operation: {args.operation}")
 
         return 0 if success else 1
 
-    except KeyboardInterrupt:
-        print("\nOperation cancelled by user", file=sys.stderr)
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        _err("\nOperation cancelled by user")
         return 130
     except FileCombinerError as e:
-        print(f"Error: {e}", file=sys.stderr)
+        _err(f"Error: {e}")
         return 1
     except Exception as e:
-        print(f"Unexpected error: {e}", file=sys.stderr)
+        _err(f"Unexpected error: {e}")
         if args.verbose if "args" in locals() else False:
             traceback.print_exc()
         return 1
@@ -3047,7 +4601,31 @@ Examples:
 
 def cli_main():
     """Synchronous entry point for console scripts"""
-    return asyncio.run(main())
+    # Parse before starting an event loop: --help and --version exit here,
+    # and commands that need no loop return without one
+    args = _build_parser().parse_args()
+    status = _run_sync_command(args)
+    if status is not None:
+        return status
+
+    cancel_event = threading.Event()
+
+    def request_cancel(signum, frame):
+        """Flag cancellation; a second Ctrl-C interrupts immediately"""
+        if cancel_event.is_set():
+            raise KeyboardInterrupt
+        cancel_event.set()
+
+    try:
+        previous_handler = signal.signal(signal.SIGINT, request_cancel)
+    except (ValueError, OSError):
+        # Not running in the main thread - rely on KeyboardInterrupt
+        return asyncio.run(main(args=args))
+
+    try:
+        return asyncio.run(main(cancel_event, args))
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
 
 
 if __name__ == "__main__":
@@ -4,6 +4,7 @@ Comprehensive test suite for file_combiner module
 """
 
 import asyncio
+import io
 import tempfile
 import pytest
 from pathlib import Path
@@ -11,12 +12,30 @@ import shutil
 import sys
 import os
 import gzip
+import hashlib
 import json
 import base64
+import binascii
 
 # Add parent directory to path to import file_combiner
 sys.path.insert(0, str(Path(__file__).parent.parent))
-from file_combiner import FileCombiner, FileCombinerError, SecurityError, __version__
+from file_combiner import (
+    HAS_ZSTD,
+    FileCombiner,
+    FileCombinerError,
+    SecurityError,
+    __version__,
+    _advise_sequential,
+    _ArchiveReader,
+    _b64decode,
+    _b64encode,
+    _count_trailing_newlines,
+    _dumps_json,
+    _Entry,
+    _is_utf8,
+    _loads_json,
+    _thread_buffer,
+)
 
 
 class TestFileCombiner:
@@ -136,6 +155,16 @@ class TestFileCombiner:
         # Binary files should be detected as binary
         assert combiner._is_binary(sample_project / "binary.dat")
 
+        # Known binary extensions and MIME types skip the content sniff
+        (sample_project / "logo.PNG").write_text("not really an image")
+        (sample_project / "clip.aiff").write_text("not really audio")
+        (sample_project / "icon.svg").write_text("<svg/>")
+        (sample_project / "blank.png").write_bytes(b"")
+        assert combiner._is_binary(sample_project / "logo.PNG")
+        assert combiner._is_binary(sample_project / "clip.aiff")
+        assert not combiner._is_binary(sample_project / "icon.svg")
+        assert not combiner._is_binary(sample_project / "blank.png")
+
     def test_should_exclude(self, combiner, sample_project):
         """Test file exclusion logic with various patterns"""
         # Files that should be included
@@ -166,6 +195,13 @@ class TestFileCombiner:
         )
         assert should_exclude
 
+        # Missing files are reported without a separate existence check
+        should_exclude, reason = combiner._should_exclude(
+            sample_project / "missing.txt", "missing.txt"
+        )
+        assert should_exclude
+        assert reason == "file does not exist"
+
     def test_matches_pattern(self, combiner):
         """Test pattern matching functionality"""
         patterns = ["*.py", "test/**/*", "*.log"]
@@ -309,6 +345,235 @@ class TestFileCombiner:
         restored_readme = (restored_dir / "README.md").read_text()
         assert original_readme == restored_readme
 
+    @pytest.mark.asyncio
+    async def test_split_files_small_read_chunks(
+        self, combiner, sample_project, temp_dir, monkeypatch
+    ):
+        """Test that entries spanning read chunk boundaries are restored"""
+        # Compressed archives are read in chunks; plain ones are mapped
+        combined_file = temp_dir / "combined.txt.gz"
+        success = await combiner.combine_files(
+            sample_project, combined_file, compress=True, progress=False
+        )
+        assert success
+
+        monkeypatch.setattr("file_combiner._INPUT_BUFFER_SIZE", 7)
+        restored_dir = temp_dir / "restored"
+        success = await combiner.split_files(
+            combined_file, restored_dir, progress=False
+        )
+        assert success
+
+        for name in ("README.md", "main.py", "binary.dat", "empty.txt"):
+            original = (sample_project / name).read_bytes()
+            assert (restored_dir / name).read_bytes() == original
+
+    def test_metadata_to_dict_matches_asdict(self):
+        """Test the hand-written to_dict stays in step with the fields"""
+        import dataclasses
+
+        from file_combiner import FileMetadata
+
+        metadata = FileMetadata(
+            path="a/b.py", size=3, mtime=1.5, mode=0o644, checksum="x"
+        )
+        assert list(metadata.to_dict().items()) == list(
+            dataclasses.asdict(metadata).items()
+        )
+
+    def test_import_defers_optional_modules(self):
+        """Test that importing the module leaves progress/gitignore libs unloaded"""
+        import subprocess
+
+        script = (
+            "import sys, file_combiner; "
+            "print(sorted({'rich', 'tqdm', 'pathspec'} & set(sys.modules)))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=Path(__file__).resolve().parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout.strip() == "[]"
+
+    def test_detect_compression(self, combiner, temp_dir):
+        """Test compression detection from suffix and magic bytes"""
+        (temp_dir / "plain.txt").write_bytes(b"hello")
+        (temp_dir / "packed.bin").write_bytes(gzip.compress(b"hello"))
+        (temp_dir / "frame.bin").write_bytes(b"\x28\xb5\x2f\xfd" + b"\0" * 8)
+        (temp_dir / "named.gz").write_bytes(b"hello")
+        assert combiner._detect_compression(temp_dir / "plain.txt") is None
+        assert combiner._detect_compression(temp_dir / "packed.bin") == "gzip"
+        assert combiner._detect_compression(temp_dir / "frame.bin") == "zstd"
+        assert combiner._detect_compression(temp_dir / "named.gz") == "gzip"
+        assert combiner._detect_compression(temp_dir / "missing.zst") == "zstd"
+        assert combiner._detect_compression(temp_dir / "missing.gz") == "gzip"
+        assert combiner._detect_compression(temp_dir / "missing.txt") is None
+
+    @pytest.mark.asyncio
+    async def test_read_total_files(self, combiner, sample_project, temp_dir):
+        """Test the split progress total is read from the archive header"""
+        plain_file = temp_dir / "combined.txt"
+        gz_file = temp_dir / "combined.txt.gz"
+        assert await combiner.combine_files(sample_project, plain_file, progress=False)
+        expected = combiner.stats["files_processed"]
+        assert await combiner.combine_files(
+            sample_project, gz_file, compress=True, progress=False
+        )
+
+        with open(plain_file, "rb") as f:
+            reader = _ArchiveReader(f)
+            assert combiner._read_total_files(reader) == expected
+            # Peeking leaves the stream where it was
+            assert reader.readline() == b"# Enhanced Combined Files Archive"
+            reader.close()
+        with gzip.open(gz_file, "rb") as f:
+            assert combiner._read_total_files(_ArchiveReader(f)) == expected
+        headerless = io.BytesIO(plain_file.read_bytes().split(b"\n\n", 1)[1])
+        assert combiner._read_total_files(_ArchiveReader(headerless)) is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not HAS_ZSTD, reason="zstandard not installed")
+    async def test_split_files_zstd(self, combiner, sample_project, temp_dir):
+        """Test round trip through a zstandard compressed archive"""
+        combined_file = temp_dir / "combined.txt.zst"
+        success = await combiner.combine_files(
+            sample_project, combined_file, compress=True, progress=False
+        )
+        assert success
+        assert combined_file.read_bytes()[:4] == b"\x28\xb5\x2f\xfd"
+
+        restored_dir = temp_dir / "restored"
+        success = await combiner.split_files(
+            combined_file, restored_dir, progress=False
+        )
+        assert success
+
+        original_binary = (sample_project / "binary.dat").read_bytes()
+        restored_binary = (restored_dir / "binary.dat").read_bytes()
+        assert original_binary == restored_binary
+        original_readme = (sample_project / "README.md").read_text()
+        restored_readme = (restored_dir / "README.md").read_text()
+        assert original_readme == restored_readme
+
+    def test_gzip_output_is_buffered(self, combiner, temp_dir):
+        """Test that many small writes to a gzip sink round-trip intact"""
+        output = temp_dir / "small_writes.txt.gz"
+        with open(output, "wb") as raw, combiner._open_compressor(raw, output) as f:
+            assert isinstance(f, io.BufferedWriter)
+            for i in range(10000):
+                f.write(b"line %d\n" % i)
+        expected = b"".join(b"line %d\n" % i for i in range(10000))
+        assert gzip.decompress(output.read_bytes()) == expected
+
+    def test_compression_backend(self, temp_dir, monkeypatch):
+        """Test gzip backend selection and its level handling"""
+        import file_combiner
+
+        assert FileCombiner({"compression_backend": "gzip"})._gzip_module is gzip
+        with pytest.raises(ValueError):
+            FileCombiner({"compression_backend": "lzma"})
+        monkeypatch.setattr(file_combiner, "HAS_ISAL", False)
+        monkeypatch.setattr(file_combiner, "HAS_ZLIB_NG", False)
+        assert FileCombiner({})._gzip_module is gzip
+        with pytest.raises(FileCombinerError):
+            FileCombiner({"compression_backend": "isal"})
+
+        # Pretend the stdlib is ISA-L to check "auto" and the level cap
+        levels = []
+
+        class FakeIsal:
+            @staticmethod
+            def GzipFile(compresslevel, **kwargs):
+                levels.append(compresslevel)
+                return gzip.GzipFile(compresslevel=compresslevel, **kwargs)
+
+        monkeypatch.setattr(file_combiner, "HAS_ISAL", True)
+        monkeypatch.setattr(file_combiner, "isal_gzip", FakeIsal)
+        assert FileCombiner({})._gzip_module is FakeIsal
+        assert FileCombiner({"compression_level": 9})._gzip_module is gzip
+        combiner = FileCombiner({"compression_backend": "isal", "compression_level": 9})
+        output = temp_dir / "isal.txt.gz"
+        with open(output, "wb") as raw, combiner._open_compressor(raw, output) as f:
+            f.write(b"isal\n")
+        assert levels == [3]
+        assert gzip.decompress(output.read_bytes()) == b"isal\n"
+
+        # "auto" follows the level a write uses: a small archive under the
+        # balanced profile is written at level 1, which ISA-L covers
+        combiner = FileCombiner({"compression_profile": "balanced"})
+        assert combiner._gzip_module is gzip
+        with open(output, "wb") as raw, combiner._open_compressor(raw, output) as f:
+            f.write(b"balanced\n")
+        assert levels == [3, 1]
+        assert gzip.decompress(output.read_bytes()) == b"balanced\n"
+
+    def test_compression_profiles(self, combiner):
+        """Test that compression profiles pick levels by archive size"""
+        small, large = 1024, 64 * 1024 * 1024
+        assert combiner._compression_levels(large) == (1, 3)
+
+        def levels(profile, size):
+            return FileCombiner(
+                {"compression_profile": profile}
+            )._compression_levels(size)
+
+        assert levels("latency", large) == (1, 3)
+        assert levels("balanced", small) == (1, 3)
+        assert levels("balanced", large) == (6, 12)
+        assert levels("archive", small) == (9, 19)
+        with pytest.raises(ValueError):
+            FileCombiner({"compression_profile": "tiny"})
+
+    @pytest.mark.skipif(not HAS_ZSTD, reason="zstandard not installed")
+    def test_zstd_level(self, combiner, temp_dir):
+        """Test that .zst output uses its own compression level"""
+        import zstandard
+
+        assert combiner.zstd_level == 3
+        assert combiner.compression_level == 1
+        data = b"zstd level test\n" * 1000
+        sizes = {}
+        for level in (1, 19):
+            output = temp_dir / f"level{level}.txt.zst"
+            level_combiner = FileCombiner({"zstd_level": level})
+            with open(output, "wb") as raw, level_combiner._open_compressor(
+                raw, output
+            ) as f:
+                f.write(data)
+            compressed = output.read_bytes()
+            assert zstandard.ZstdDecompressor().decompressobj().decompress(
+                compressed
+            ) == data
+            sizes[level] = len(compressed)
+        assert sizes[19] <= sizes[1]
+
+    @pytest.mark.asyncio
+    async def test_split_files_raw_binary(self, sample_project, temp_dir):
+        """Test round trip with binary files embedded as raw bytes"""
+        combiner = FileCombiner({"embed_binary_raw": True})
+        combined_file = temp_dir / "combined.txt"
+        success = await combiner.combine_files(
+            sample_project, combined_file, progress=False
+        )
+        assert success
+        assert b"ENCODING: raw" in combined_file.read_bytes()
+
+        restored_dir = temp_dir / "restored"
+        success = await combiner.split_files(
+            combined_file, restored_dir, progress=False
+        )
+        assert success
+
+        original_binary = (sample_project / "binary.dat").read_bytes()
+        restored_binary = (restored_dir / "binary.dat").read_bytes()
+        assert original_binary == restored_binary
+        original_readme = (sample_project / "README.md").read_text()
+        restored_readme = (restored_dir / "README.md").read_text()
+        assert original_readme == restored_readme
+
     @pytest.mark.asyncio
     async def test_dry_run_combine(self, combiner, sample_project, temp_dir, capsys):
         """Test dry run functionality"""
@@ -473,6 +738,158 @@ class TestFileCombiner:
         checksum3 = verbose_combiner._calculate_checksum(test_file3)
         assert checksum != checksum3
 
+    def test_checksum_algorithm(self, temp_dir, monkeypatch):
+        """Test checksum algorithm selection and digest formatting"""
+        test_file = temp_dir / "algo.txt"
+        test_file.write_bytes(b"checksum algorithm\n")
+        data = test_file.read_bytes()
+
+        default = FileCombiner({})
+        assert default._calculate_checksum(test_file) == hashlib.sha256(data).hexdigest()
+
+        with pytest.raises(ValueError):
+            FileCombiner({"checksum_algorithm": "crc1"})
+        monkeypatch.setattr("file_combiner.HAS_BLAKE3", False)
+        with pytest.raises(FileCombinerError):
+            FileCombiner({"checksum_algorithm": "blake3"})
+
+        # Non-default algorithms are recorded with their name
+        other = FileCombiner({})
+        other.checksum_algorithm = "md5"
+        other._new_hasher = hashlib.md5
+        assert other._calculate_checksum(test_file) == (
+            "md5:" + hashlib.md5(data).hexdigest()
+        )
+
+    @pytest.mark.asyncio
+    async def test_checksums_taken_from_content_read(self, temp_dir):
+        """Test archived checksums match the original bytes of each file"""
+        source = temp_dir / "checksum_src"
+        source.mkdir()
+        files = {
+            "crlf.txt": b"windows\r\nline endings\r\n",
+            "latin1.txt": b"caf\xe9\n",
+            "blob.bin": bytes(range(256)) * 4,
+        }
+        for name, data in files.items():
+            (source / name).write_bytes(data)
+
+        combiner = FileCombiner({"calculate_checksums": True})
+        output_file = temp_dir / "checksums.txt"
+        assert await combiner.combine_files(source, output_file, progress=False)
+
+        recorded = {}
+        for line in output_file.read_text(encoding="utf-8").splitlines():
+            if line.startswith("FILE_METADATA: "):
+                metadata = json.loads(line[len("FILE_METADATA: ") :])
+                recorded[metadata["path"]] = metadata["checksum"]
+        assert recorded == {
+            name: hashlib.sha256(data).hexdigest() for name, data in files.items()
+        }
+
+    def test_dumps_json_handles_surrogate_paths(self):
+        """Test metadata serialization for names that are not valid UTF-8"""
+        data = {"path": "bad\udcff.txt", "size": 1}
+        assert json.loads(_dumps_json(data)) == data
+        assert json.loads(_dumps_json({"path": "caf\u00e9"}, indent=True)) == {
+            "path": "caf\u00e9"
+        }
+
+    def test_loads_json_handles_surrogate_paths(self):
+        """Test metadata parsing for names that are not valid UTF-8"""
+        data = {"path": "bad\udcff.txt", "size": 1}
+        assert _loads_json(_dumps_json(data)) == data
+        assert _loads_json('{"path": "caf\u00e9"}') == {"path": "caf\u00e9"}
+        with pytest.raises(json.JSONDecodeError):
+            _loads_json(b"{not json")
+
+    def test_advise_sequential_tolerates_any_stream(self, temp_dir):
+        """Test the read-ahead hint is a no-op for streams without a descriptor"""
+        path = temp_dir / "advise.txt"
+        path.write_bytes(b"data")
+        with open(path, "rb") as f:
+            _advise_sequential(f)
+            assert f.read() == b"data"
+        _advise_sequential(io.BytesIO(b"data"))
+        _advise_sequential(object())
+
+    def test_thread_buffer_reused_per_thread(self):
+        """Test that each thread gets one read buffer, resized on demand"""
+        import threading
+
+        first = _thread_buffer(64)
+        assert len(first) == 64
+        assert _thread_buffer(64) is first
+        assert len(_thread_buffer(32)) == 32
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(_thread_buffer(32)))
+        thread.start()
+        thread.join()
+        assert other[0] is not _thread_buffer(32)
+
+    def test_is_utf8_across_chunks(self, monkeypatch):
+        """Test UTF-8 validation with sequences split across chunk boundaries"""
+        monkeypatch.setattr("file_combiner._UTF8_CHECK_CHUNK", 3)
+        assert _is_utf8(b"plain ascii")
+        assert _is_utf8("caf\u00e9 \u2603 \U0001f600".encode("utf-8") * 5)
+        assert not _is_utf8(b"latin1 caf\xe9")
+        assert not _is_utf8(b"truncated \xe2\x98")
+
+    def test_b64_helpers_match_stdlib(self):
+        """Test the base64 helpers against the stdlib, line breaks included"""
+        data = bytes(range(256)) * 3 + b"x"
+        encoded = base64.b64encode(data)
+        assert _b64encode(data) == encoded
+        assert _b64encode(memoryview(data)[:57]) == base64.b64encode(data[:57])
+        wrapped = b"\n".join(encoded[i : i + 76] for i in range(0, len(encoded), 76))
+        assert _b64decode(wrapped) == data
+        assert _b64decode(wrapped.decode("ascii")) == data
+        with pytest.raises(binascii.Error):
+            _b64decode(b"abcde")
+
+    def test_restore_text_lines_batched(self, combiner, temp_dir, monkeypatch):
+        """Test str lines are written in batches with newline fixup"""
+        monkeypatch.setattr("file_combiner._TEXT_WRITE_BATCH", 2)
+        monkeypatch.setattr("file_combiner._TEXT_WRITE_CHARS", 3)
+        for lines in (
+            ["a", "b", "caf\u00e9", "", ""],
+            ["x"],
+            [""],
+            ["", ""],
+            ["one\ncaf\u00e9 \u2603 line\n\n"],
+        ):
+            expected = "\n".join(lines)
+            assert _count_trailing_newlines(lines) == len(expected) - len(
+                expected.rstrip("\n")
+            )
+            for ends_with_newline in (True, False):
+                metadata = {"path": "f.txt", "ends_with_newline": ends_with_newline}
+                combiner._restore_file_sync(temp_dir, metadata, None, lines)
+                want = expected.rstrip("\n") if not ends_with_newline else expected
+                if ends_with_newline and want and not want.endswith("\n"):
+                    want += "\n"
+                assert (temp_dir / "f.txt").read_bytes() == want.encode("utf-8")
+
+    def test_guess_mime_type_cache(self, combiner):
+        """Test that the per-extension MIME cache agrees with mimetypes"""
+        import mimetypes
+
+        names = ["a.py", "b.PY", "c.tar.gz", "d.tgz", "e", ".bashrc", "f.tar.Z"]
+        for name in names * 2:
+            assert combiner._guess_mime_type(name) == mimetypes.guess_type(name)[0]
+
+    def test_checksum_large_file(self, verbose_combiner, temp_dir):
+        """Test that the mmap checksum path matches hashlib"""
+        import hashlib
+
+        test_file = temp_dir / "large_checksum.bin"
+        data = os.urandom(3 * 1024 * 1024)
+        test_file.write_bytes(data)
+
+        checksum = verbose_combiner._calculate_checksum(test_file)
+        assert checksum == hashlib.sha256(data).hexdigest()
+
     @pytest.mark.asyncio
     async def test_unicode_handling(self, combiner, temp_dir):
         """Test handling of various unicode content"""
@@ -576,6 +993,24 @@ class TestFileCombiner:
         ).read_bytes() == b"Start\x00\x01Binary\x02\x03End"
         assert (restored_dir / "text.txt").read_text() == "Normal text file"
 
+    @pytest.mark.asyncio
+    async def test_ignore_binary_files(self, temp_dir):
+        """Test that ignore_binary skips binary files entirely"""
+        project_dir = temp_dir / "ignore_binary_test"
+        project_dir.mkdir()
+        (project_dir / "data.bin").write_bytes(b"\x00\x01\x02\x03")
+        (project_dir / "text.txt").write_text("Normal text file")
+
+        combiner = FileCombiner({"ignore_binary": True})
+        output_file = temp_dir / "ignore_binary_combined.txt"
+        success = await combiner.combine_files(project_dir, output_file, progress=False)
+        assert success
+
+        content = output_file.read_text()
+        assert "text.txt" in content
+        assert "data.bin" not in content
+        assert combiner.stats["files_skipped"] == 1
+
     @pytest.mark.asyncio
     async def test_deep_directory_structure(self, combiner, temp_dir):
         """Test handling of deeply nested directory structures"""
@@ -701,6 +1136,157 @@ class TestFileCombiner:
         assert output_dir.exists()
         assert len(list(output_dir.iterdir())) == 0  # No files restored
 
+    @pytest.mark.asyncio
+    async def test_split_skips_metadata_without_path(self, combiner, temp_dir):
+        """An entry whose metadata has no path is skipped, not fatal"""
+        archive = temp_dir / "nopath.txt"
+        archive.write_text(
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"size": 3}\n'
+            "ENCODING: utf-8\n"
+            "lost\n"
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"path": "kept.txt", "size": 3}\n'
+            "ENCODING: utf-8\n"
+            "hi\n"
+        )
+
+        output_dir = temp_dir / "nopath_output"
+        assert await combiner.split_files(archive, output_dir, progress=False)
+        assert [p.name for p in output_dir.iterdir()] == ["kept.txt"]
+        assert (output_dir / "kept.txt").read_text() == "hi\n"
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(os.name == "nt", reason="POSIX permissions only")
+    async def test_split_preserves_permissions(self, temp_dir):
+        """Test that mode and mtime are restored when requested"""
+        source_dir = temp_dir / "source"
+        (source_dir / "sub").mkdir(parents=True)
+        script = source_dir / "run.sh"
+        script.write_text("#!/bin/sh\necho hi\n")
+        script.chmod(0o751)
+        blob = source_dir / "sub" / "blob.bin"
+        blob.write_bytes(b"\x00\xff" * 100)
+        blob.chmod(0o600)
+        for path in (script, blob):
+            os.utime(path, (1000000000, 1000000000))
+
+        combiner = FileCombiner({"preserve_permissions": True})
+        archive = temp_dir / "archive.txt"
+        assert await combiner.combine_files(source_dir, archive, progress=False)
+        restored_dir = temp_dir / "restored"
+        assert await combiner.split_files(archive, restored_dir, progress=False)
+
+        for name in ("run.sh", "sub/blob.bin"):
+            original = (source_dir / name).stat()
+            restored = (restored_dir / name).stat()
+            assert restored.st_mode == original.st_mode
+            assert restored.st_mtime == original.st_mtime
+
+    @pytest.mark.asyncio
+    async def test_corrupt_entry_does_not_affect_next(self, combiner, temp_dir):
+        """Test that a bad base64 entry is skipped without losing the next one"""
+        archive = temp_dir / "corrupt.txt"
+        archive.write_text(
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"path": "bad.bin", "is_binary": true}\n'
+            "ENCODING: base64\n"
+            "AAAA!\n"
+            "A\n"
+            "\n"
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"path": "good.txt", "ends_with_newline": true}\n'
+            "ENCODING: utf-8\n"
+            "hello\n"
+        )
+
+        output_dir = temp_dir / "corrupt_output"
+        success = await combiner.split_files(archive, output_dir, progress=False)
+        assert success
+        assert (output_dir / "good.txt").read_text() == "hello\n"
+
+    @pytest.mark.asyncio
+    async def test_split_progress_reports_all_files(
+        self, combiner, temp_dir, monkeypatch, capsys
+    ):
+        """Test that batched split progress still accounts for every file"""
+        monkeypatch.setattr("file_combiner.HAS_RICH", False)
+        monkeypatch.setattr("file_combiner.HAS_TQDM", False)
+        monkeypatch.setattr("file_combiner._PROGRESS_BATCH", 4)
+        archive = temp_dir / "progress.txt"
+        archive.write_text(
+            "# Total files: 10\n\n"
+            + "".join(
+                "=== FILE_SEPARATOR ===\n"
+                f'FILE_METADATA: {{"path": "f{i}.txt"}}\n'
+                f"ENCODING: utf-8\nline {i}\n\n"
+                for i in range(10)
+            )
+        )
+
+        output_dir = temp_dir / "progress_output"
+        assert await combiner.split_files(archive, output_dir, progress=True)
+        out = capsys.readouterr().out
+        assert "Extracting 10 files..." in out
+        assert "Extracted 10/10 files..." in out
+        assert out.rstrip().endswith("Extracted 10 files")
+
+    @pytest.mark.asyncio
+    async def test_split_entries_without_encoding_line(self, combiner, temp_dir):
+        """Test that entries with no content restore as empty, including the last"""
+        archive = temp_dir / "empty_entries.txt"
+        archive.write_text(
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"path": "first.txt"}\n'
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"path": "middle.txt", "ends_with_newline": true}\n'
+            "ENCODING: utf-8\n"
+            "hello\n"
+            "\n"
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"path": "last.txt"}\n'
+        )
+
+        output_dir = temp_dir / "empty_entries_output"
+        success = await combiner.split_files(archive, output_dir, progress=False)
+        assert success
+        assert (output_dir / "first.txt").read_bytes() == b""
+        assert (output_dir / "middle.txt").read_text() == "hello\n"
+        assert (output_dir / "last.txt").read_bytes() == b""
+
+    @pytest.mark.asyncio
+    async def test_split_preallocation_trimmed(self, combiner, temp_dir):
+        """Test that a preallocated file is cut back to the bytes restored"""
+        archive = temp_dir / "overstated.txt"
+        archive.write_text(
+            "=== FILE_SEPARATOR ===\n"
+            'FILE_METADATA: {"path": "blob.bin", "size": 4194304, "is_binary": true}\n'
+            "ENCODING: base64\n"
+            f"{base64.b64encode(b'payload').decode()}\n"
+        )
+
+        output_dir = temp_dir / "overstated_output"
+        assert await combiner.split_files(archive, output_dir, progress=False)
+        assert (output_dir / "blob.bin").read_bytes() == b"payload"
+
+    @pytest.mark.asyncio
+    async def test_split_duplicate_paths_last_wins(self, combiner, temp_dir):
+        """Test that a path repeated in an archive ends with its last content"""
+        entries = []
+        for i in range(20):
+            entries.append(
+                "=== FILE_SEPARATOR ===\n"
+                'FILE_METADATA: {"path": "same.txt", "ends_with_newline": true}\n'
+                f"ENCODING: utf-8\nversion {i}\n\n"
+            )
+        archive = temp_dir / "duplicates.txt"
+        archive.write_text("".join(entries))
+
+        output_dir = temp_dir / "duplicates_output"
+        success = await combiner.split_files(archive, output_dir, progress=False)
+        assert success
+        assert (output_dir / "same.txt").read_text() == "version 19\n"
+
     @pytest.mark.asyncio
     async def test_statistics_tracking(
         self, verbose_combiner, sample_project, temp_dir
@@ -747,6 +1333,23 @@ exclude_patterns = ["*.test", "temp/*"]
         assert config["max_workers"] == 4
         assert config["exclude_patterns"] == ["*.test", "temp/*"]
 
+    def test_config_loading_toml_and_legacy(self, temp_dir):
+        """Test multi-line TOML lists and fallback for non-TOML configs"""
+        from file_combiner import HAS_TOMLLIB, load_config_file
+
+        legacy_file = temp_dir / "legacy_config"
+        legacy_file.write_text("max_file_size = 100M\nverbose = true\n")
+        config = load_config_file(legacy_file)
+        assert config == {"max_file_size": "100M", "verbose": True}
+
+        if HAS_TOMLLIB:
+            toml_file = temp_dir / "toml_config"
+            toml_file.write_text(
+                'exclude_patterns = [\n    "a,b/*",\n    "*.old",\n]\n'
+            )
+            config = load_config_file(toml_file)
+            assert config["exclude_patterns"] == ["a,b/*", "*.old"]
+
     def test_cleanup_temp_files(self, combiner):
         """Test that temporary files are properly cleaned up"""
         # Add some fake temp files
@@ -774,6 +1377,38 @@ exclude_patterns = ["*.test", "temp/*"]
         assert not combiner._is_github_url("not-a-url")
         assert not combiner._is_github_url("")
 
+    @pytest.mark.skipif(shutil.which("git") is None, reason="git not available")
+    def test_clone_skips_excluded_directories(self, combiner, temp_dir):
+        """Test that cloning leaves wholly excluded directories unchecked-out"""
+        import subprocess
+
+        repo = temp_dir / "upstream"
+        (repo / "src").mkdir(parents=True)
+        (repo / "node_modules" / "pkg").mkdir(parents=True)
+        (repo / "src" / "main.py").write_text("print('hi')\n")
+        (repo / "node_modules" / "pkg" / "index.js").write_text("// pkg\n")
+
+        def git(*args):
+            subprocess.run(
+                ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                cwd=repo,
+                check=True,
+                capture_output=True,
+            )
+
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "init")
+
+        assert "!/node_modules/" in combiner._sparse_checkout_patterns()
+        cloned = combiner._clone_github_repo(repo.as_uri())
+        try:
+            assert cloned is not None
+            assert (cloned / "src" / "main.py").read_text() == "print('hi')\n"
+            assert not (cloned / "node_modules").exists()
+        finally:
+            combiner._cleanup_temp_files()
+
     def test_detect_output_format(self, combiner):
         """Test output format detection"""
         from pathlib import Path
@@ -815,6 +1450,10 @@ exclude_patterns = ["*.test", "temp/*"]
         # Test unknown extensions
         assert combiner._detect_language("test.unknown") == ""
         assert combiner._detect_language("test") == ""
+        # Only the last path component counts, and a leading dot is no suffix
+        assert combiner._detect_language("pkg.d/Makefile") == ""
+        assert combiner._detect_language("scripts/.sh") == ""
+        assert combiner._detect_language("src/app.main.py") == "python"
 
 
 class TestMultiFormatOutput:
@@ -1041,6 +1680,9 @@ class TestMultiFormatOutput:
         binary_file = next(f for f in data["files"] if f["path"].endswith("binary.bin"))
         assert binary_file["is_binary"] == True
         assert binary_file["encoding"] == "base64"
+        assert binary_file["content"] == base64.b64encode(
+            b"\x00\x01\x02\x03\xff\xfe\xfd"
+        ).decode("ascii")
 
 
 class TestEdgeCases:
@@ -1086,6 +1728,62 @@ class TestEdgeCases:
         content = output_file.read_text()
         assert "normal.txt" in content
 
+    @pytest.mark.skipif(sys.platform == "win32", reason="symlinks need privileges")
+    def test_symlink_loop_scanned_once(self, temp_dir):
+        """Test that a directory symlink cycle is visited only once"""
+        project_dir = temp_dir / "loop_test"
+        (project_dir / "sub").mkdir(parents=True)
+        (project_dir / "sub" / "file.txt").write_text("content")
+        os.symlink(project_dir, project_dir / "sub" / "back")
+
+        combiner = FileCombiner({"follow_symlinks": True})
+        scanned = [entry.relative_path for entry in combiner._scan_directory(project_dir)]
+
+        assert scanned == ["sub/file.txt"]
+
+    @pytest.mark.asyncio
+    async def test_cancel_event_aborts_combine(self, temp_dir):
+        """Test that a set cancel event aborts combine without leaving output"""
+        import threading
+
+        project_dir = temp_dir / "cancel_test"
+        project_dir.mkdir()
+        (project_dir / "a.txt").write_text("a")
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+        combiner = FileCombiner({"cancel_event": cancel_event})
+        output_file = temp_dir / "cancelled.txt"
+
+        with pytest.raises(asyncio.CancelledError):
+            await combiner.combine_files(project_dir, output_file, progress=False)
+        assert not output_file.exists()
+        assert not list(temp_dir.glob("*.tmp"))
+
+    @pytest.mark.asyncio
+    async def test_cancel_event_aborts_checksum_workers(self, temp_dir):
+        """Test that cancellation propagates out of the metadata workers"""
+        import threading
+
+        project_dir = temp_dir / "cancel_workers_test"
+        project_dir.mkdir()
+        for i in range(20):
+            (project_dir / f"file_{i}.txt").write_text(f"content {i}")
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+        combiner = FileCombiner(
+            {"cancel_event": cancel_event, "calculate_checksums": True}
+        )
+        output_file = temp_dir / "cancelled.txt"
+
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(
+                combiner.combine_files(project_dir, output_file, progress=False),
+                timeout=10,
+            )
+        assert not output_file.exists()
+
     def test_invalid_configuration(self):
         """Test handling of invalid configuration values"""
         # Invalid max_file_size
@@ -1194,6 +1892,10 @@ class TestSecurityFeatures:
         fence = combiner._get_safe_fence(normal_content)
         assert fence == "```"  # Standard fence
 
+        # UTF-8 bytes are measured the same way, without decoding
+        assert combiner._get_safe_fence("caf\u00e9 ``".encode("utf-8")) == "```"
+        assert combiner._get_safe_fence(b"x ````` y ```") == "``````"
+
     @pytest.mark.asyncio
     async def test_malicious_archive_path_traversal(self, combiner, temp_dir):
         """Test that a malicious archive with path traversal is handled safely"""
@@ -1445,6 +2147,28 @@ class TestMultiFormatRoundTrip:
         # Verify files were restored
         assert (restored_dir / "main.py").exists()
 
+    @pytest.mark.asyncio
+    async def test_json_split_parallel_writes(self, temp_dir):
+        """Test that pooled restores write every file and keep the last duplicate"""
+        combiner = FileCombiner({"max_workers": 4})
+        files = [
+            {"path": f"dir{i % 5}/f{i}.txt", "encoding": "utf-8", "content": f"file {i}\n"}
+            for i in range(60)
+        ]
+        files += [
+            {"path": "same.txt", "encoding": "utf-8", "content": f"version {i}\n"}
+            for i in range(20)
+        ]
+        archive = temp_dir / "many.json"
+        archive.write_text(json.dumps({"metadata": {}, "files": files}))
+
+        output_dir = temp_dir / "many_output"
+        assert await combiner.split_files(archive, output_dir, progress=False)
+        for i in range(60):
+            path = output_dir / f"dir{i % 5}" / f"f{i}.txt"
+            assert path.read_text() == f"file {i}\n"
+        assert (output_dir / "same.txt").read_text() == "version 19\n"
+
     @pytest.mark.asyncio
     async def test_format_detection(self, combiner, sample_project, temp_dir):
         """Test automatic format detection"""
@@ -1473,6 +2197,81 @@ class TestAsyncPerformance:
         yield Path(temp_dir)
         shutil.rmtree(temp_dir)
 
+    def test_read_ahead_window(self, temp_dir, monkeypatch):
+        """Test that read-ahead keeps order and stays within its byte window"""
+        import threading
+
+        from file_combiner import FileMetadata
+
+        monkeypatch.setattr("file_combiner._READAHEAD_BYTES", 250)
+        combiner = FileCombiner({"max_workers": 4})
+        entries = []
+        for i in range(12):
+            path = temp_dir / f"f{i}.txt"
+            path.write_bytes(b"%d" % i * 100)
+            metadata = FileMetadata(path=path.name, size=100, mtime=0.0, mode=0o644)
+            entries.append((metadata, str(path)))
+
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current, peak
+        read = combiner._read_file_content
+
+        def tracked(file_path, metadata):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            try:
+                return read(file_path, metadata)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        monkeypatch.setattr(combiner, "_read_file_content", tracked)
+        results = list(combiner._iter_contents(entries))
+
+        assert [m.path for m, _ in results] == [f"f{i}.txt" for i in range(12)]
+        assert all(c == b"%d" % i * 100 for i, (_, c) in enumerate(results))
+        assert in_flight[1] <= 2
+
+    def test_read_concurrency(self, temp_dir, monkeypatch):
+        """Test that reads in flight are capped by read_concurrency"""
+        import threading
+        import time
+
+        from file_combiner import FileMetadata
+
+        assert FileCombiner({"max_workers": 16}).read_concurrency == 8
+        assert FileCombiner({"max_workers": 2}).read_concurrency == 2
+        assert FileCombiner({"read_concurrency": 0}).read_concurrency >= 1
+
+        combiner = FileCombiner({"max_workers": 16, "read_concurrency": 3})
+        assert combiner.read_concurrency == 3
+        entries = []
+        for i in range(12):
+            path = temp_dir / f"f{i}.txt"
+            path.write_bytes(b"x")
+            metadata = FileMetadata(path=path.name, size=1, mtime=0.0, mode=0o644)
+            entries.append((metadata, str(path)))
+
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current, peak
+        read = combiner._read_file_content
+
+        def slow(file_path, metadata):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.01)
+            try:
+                return read(file_path, metadata)
+            finally:
+                with lock:
+                    in_flight[0] -= 1
+
+        monkeypatch.setattr(combiner, "_read_file_content", slow)
+        assert len(list(combiner._iter_contents(entries))) == 12
+        assert 1 < in_flight[1] <= 3
+
     @pytest.mark.asyncio
     async def test_prefetch_combine(self, temp_dir):
         """Test that combine uses prefetching for file reads"""
@@ -1799,6 +2598,135 @@ class TestIncludeExcludePatterns:
         assert "README.md" in content
         assert "src/main.py" not in content
 
+    def test_scan_prunes_excluded_directories(self, complex_project):
+        """Test that whole-directory excludes are pruned during the scan"""
+        combiner = FileCombiner({})
+
+        scanned = [entry.path for entry in combiner._scan_directory(complex_project)]
+
+        assert not any("node_modules" in p for p in scanned)
+        assert any(p.endswith("engine.py") for p in scanned)
+
+    def test_parallel_scan_matches_sequential(self, complex_project):
+        """Test that the threaded scan finds the same files in the same order"""
+        sequential = FileCombiner({"max_workers": 1})._scan_directory(complex_project)
+        parallel = FileCombiner({"max_workers": 4})._scan_directory(complex_project)
+
+        assert parallel == sequential
+        assert all(
+            entry.path.endswith(entry.relative_path) for entry in parallel
+        )
+
+    @pytest.mark.asyncio
+    async def test_batched_metadata_collection(self, complex_project, monkeypatch):
+        """Test that batched metadata workers yield one result per file"""
+        monkeypatch.setattr("file_combiner._METADATA_BATCH", 2)
+        combiner = FileCombiner({"ignore_binary": True, "max_workers": 2})
+        entries = combiner._scan_directory(complex_project)
+        baseline = [
+            result
+            async for result in combiner._iter_file_metadata(entries, complex_project)
+        ]
+        failing = next(str(result[1]) for result in baseline if result)
+        collect = combiner._collect_file_metadata
+
+        def flaky(entry, base_path):
+            if entry.path == failing:
+                raise RuntimeError("boom")
+            return collect(entry, base_path)
+
+        monkeypatch.setattr(combiner, "_collect_file_metadata", flaky)
+        results = [
+            result
+            async for result in combiner._iter_file_metadata(entries, complex_project)
+        ]
+
+        assert len(baseline) == len(results) == len(entries)
+        assert results.count(None) == baseline.count(None) + 1
+        assert combiner.stats["errors"] == 1
+
+    def test_entry_paths_stay_str(self, complex_project):
+        """Test that entries keep str paths and resolve relative paths by prefix"""
+        combiner = FileCombiner({})
+        entries = combiner._scan_directory(complex_project)
+        result = combiner._collect_file_metadata(entries[0], complex_project)
+        assert isinstance(result[1], str)
+
+        # Entries built outside the scan fall back to the path prefix
+        entry = _Entry.from_path(complex_project / "src" / "utils.py")
+        assert combiner._entry_relative_path(entry, complex_project) == "src/utils.py"
+        assert combiner._entry_relative_path(entry, complex_project / "sr") is None
+        assert combiner._entry_relative_path(entry, complex_project / "docs") is None
+
+    def test_pattern_matching_literal_directory_and_suffix(self):
+        """Test _matches_pattern with trie directory and suffix patterns"""
+        combiner = FileCombiner({})
+
+        patterns = ["node_modules/**/*", ".git/*", "*.min.js"]
+        assert combiner._matches_pattern("node_modules/pkg/index.js", patterns)
+        assert combiner._matches_pattern(".git/config", patterns)
+        assert combiner._matches_pattern("static/app.min.js", patterns)
+        assert not combiner._matches_pattern("src/node_modules/index.js", patterns)
+        assert not combiner._matches_pattern(".git", patterns)
+        assert not combiner._matches_pattern("static/app.js", patterns)
+
+    def test_scan_skips_stat_for_excluded_files(self, complex_project):
+        """Test that pattern-excluded files are listed without a stat"""
+        combiner = FileCombiner({})
+        entries = {e.relative_path: e for e in combiner._scan_directory(complex_project)}
+
+        log_entry = entries["logs/app.log"]
+        assert log_entry.size == 0 and log_entry.mode == 0
+        assert combiner._should_exclude(log_entry, "logs/app.log") == (
+            True,
+            "matches exclude pattern",
+        )
+        assert entries["README.md"].size == len("# Project")
+
+    def test_pattern_union_prefers_re2(self, monkeypatch):
+        """Test that glob unions go to RE2 when available, else to re"""
+        import re
+        import types
+
+        import file_combiner
+
+        compiled = []
+
+        def fake_compile(pattern):
+            if "(?>" in pattern or "\\Z" in pattern:
+                raise ValueError("unsupported by RE2")
+            compiled.append(pattern)
+            return re.compile(pattern)
+
+        monkeypatch.setattr(file_combiner, "HAS_RE2", True)
+        monkeypatch.setattr(
+            file_combiner, "re2", types.SimpleNamespace(compile=fake_compile)
+        )
+        combiner = FileCombiner({})
+
+        patterns = ["docs/**/*.md", "*.log"]
+        assert combiner._matches_pattern("docs/a/guide.md", patterns)
+        assert combiner._matches_pattern("logs/app.log", patterns)
+        assert not combiner._matches_pattern("docs/guide.txt", patterns)
+        assert compiled
+
+        # A union RE2 rejects is still compiled and matched by re
+        union = file_combiner._PatternMatcher._compile_union(["a(?>b)c"])
+        assert union.fullmatch("abc")
+
+    def test_pattern_matching_exact_names(self):
+        """Test _matches_pattern with patterns without glob characters"""
+        combiner = FileCombiner({})
+
+        patterns = [".DS_Store", "src/main.py"]
+        assert combiner._matches_pattern(".DS_Store", patterns)
+        assert combiner._matches_pattern("assets/.DS_Store", patterns)
+        assert combiner._matches_pattern(".DS_Store/inner.txt", patterns)
+        assert combiner._matches_pattern("src/main.py", patterns)
+        assert not combiner._matches_pattern("lib/src/main.py", patterns)
+        assert not combiner._matches_pattern("main.py", patterns)
+        assert not combiner._matches_pattern("x.DS_Store", patterns)
+
     def test_pattern_matching_glob_star(self):
         """Test _matches_pattern with single glob star"""
         combiner = FileCombiner({})